@@ -18,15 +18,15 @@ Implementation notes:
 #Import libraries
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 import colorsys
 import sqlite3
 from pathlib import Path
 
-import pandas as pd
+import numpy as np
 import streamlit as st
 
-from common.flags import get_team_flags  # used to map TeamId -> FIFA Abbreviation
+from common.flags import abbr_by_teamid  # used to map TeamId -> FIFA Abbreviation
 from common.constants import BASE_URL, SEASONID  # BASE_URL only used to keep consistency
 
 # DB location: <project_root>/assets/team_colors.db
@@ -34,79 +34,88 @@ DB_PATH = Path(__file__).resolve().parents[1] / "assets" / "team_colors.db"
 
 
 # -------------------- SQLite loader --------------------
-@st.cache_data(ttl=86400, show_spinner=False)
-def load_colors_db(db_path: Optional[str] = None) -> pd.DataFrame:
+ColorIndex = Dict[str, Tuple[str, str]]
+
+
+@st.cache_resource(show_spinner=False)
+def load_colors_db(db_path: Optional[str] = None) -> Tuple[ColorIndex, ColorIndex]:
     """
     Load team colors from the SQLite DB.
     Expects a table team_colors(name TEXT, abbr TEXT, home_color TEXT, away_color TEXT).
-    Returns a DataFrame with normalized lookup keys.
+    Returns ({key_abbr -> (home, away)}, {key_name -> (home, away)}) with
+    normalized (upper-cased, stripped) keys for O(1) lookups.
     """
     p = Path(db_path) if db_path else DB_PATH
     if not p.exists():
-        return pd.DataFrame(columns=["name", "abbr", "home_color", "away_color", "key_name", "key_abbr"])
+        return {}, {}
 
-    con = sqlite3.connect(p)
+    # Reference table never written by the app: open it read-only and
+    # immutable so SQLite skips locking and journal setup.
+    con = sqlite3.connect(f"{p.resolve().as_uri()}?mode=ro&immutable=1", uri=True)
     try:
-        df = pd.read_sql_query(
-            "SELECT name, abbr, home_color, away_color FROM team_colors",
-            con
-        )
+        con.execute("PRAGMA query_only = 1")
+        rows = con.execute("SELECT name, abbr, home_color, away_color FROM team_colors").fetchall()
     finally:
         con.close()
 
-    for c in ["name", "abbr", "home_color", "away_color"]:
-        df[c] = df[c].astype(str)
-
-    # normalized keys for robust lookups
-    df["key_name"] = df["name"].str.upper().str.strip()
-    df["key_abbr"] = df["abbr"].str.upper().str.strip()
-    return df
+    by_abbr: ColorIndex = {}
+    by_name: ColorIndex = {}
+    for name, abbr, home, away in rows:
+        # keep the first row for a key if the table has duplicates
+        by_abbr.setdefault(str(abbr).upper().strip(), (str(home), str(away)))
+        by_name.setdefault(str(name).upper().strip(), (str(home), str(away)))
+    return by_abbr, by_name
 
 
-def db_lookup_palette(df_db: pd.DataFrame, name: Optional[str], abbr: Optional[str]) -> Optional[Dict[str, str]]:
+def db_lookup_palette(by_abbr: ColorIndex, by_name: ColorIndex,
+                      name: Optional[str], abbr: Optional[str]) -> Optional[Dict[str, str]]:
     """Try abbr first, then full name. Return {'home':hex,'away':hex} or None."""
-    if df_db is None or df_db.empty:
-        return None
+    hit = None
     if abbr:
-        hit = df_db.loc[df_db["key_abbr"] == str(abbr).upper().strip()]
-        if not hit.empty:
-            row = hit.iloc[0]
-            return {"home": row["home_color"], "away": row["away_color"]}
-    if name:
-        hit = df_db.loc[df_db["key_name"] == str(name).upper().strip()]
-        if not hit.empty:
-            row = hit.iloc[0]
-            return {"home": row["home_color"], "away": row["away_color"]}
-    return None
+        hit = by_abbr.get(str(abbr).upper().strip())
+    if hit is None and name:
+        hit = by_name.get(str(name).upper().strip())
+    if hit is None:
+        return None
+    return {"home": hit[0], "away": hit[1]}
 
 
 # -------------------- Simple color math (for fallback & similarity) --------------------
 def _hex_to_rgb(hexs: str) -> Tuple[float, float, float]:
     h = hexs.strip().lstrip("#")
-    return int(h[0:2], 16) / 255.0, int(h[2:4], 16) / 255.0, int(h[4:6], 16) / 255.0
+    if len(h) != 6:
+        raise ValueError(f"expected a 6-digit hex colour, got {hexs!r}")
+    v = int(h, 16)  # one parse, then extract the channels with shifts
+    return ((v >> 16) & 0xFF) / 255.0, ((v >> 8) & 0xFF) / 255.0, (v & 0xFF) / 255.0
 
 
-def _rgb_to_lab(r: float, g: float, b: float) -> Tuple[float, float, float]:
-    # sRGB -> XYZ -> Lab (D65)
-    def f(u): return (u / 12.92) if u <= 0.04045 else (((u + 0.055) / 1.055) ** 2.4)
-    r, g, b = f(r), f(g), f(b)
-    X = r * 0.4124 + g * 0.3576 + b * 0.1805
-    Y = r * 0.2126 + g * 0.7152 + b * 0.0722
-    Z = r * 0.0193 + g * 0.1192 + b * 0.9505
-    Xn, Yn, Zn = 0.95047, 1.00000, 1.08883
+# sRGB (linear) -> XYZ matrix and D65 reference white used by the Lab conversion
+_RGB_TO_XYZ = np.array([
+    [0.4124, 0.3576, 0.1805],
+    [0.2126, 0.7152, 0.0722],
+    [0.0193, 0.1192, 0.9505],
+])
+_WHITE_D65 = np.array([0.95047, 1.00000, 1.08883])
 
-    def gfun(t): return t ** (1 / 3) if t > 0.008856 else (7.787 * t + 16 / 116)
-    fx, fy, fz = gfun(X / Xn), gfun(Y / Yn), gfun(Z / Zn)
-    L = 116 * fy - 16
-    a = 500 * (fx - fy)
-    b2 = 200 * (fy - fz)
-    return L, a, b2
+
+def _hex_to_lab_vec(hexes: Iterable[str]) -> np.ndarray:
+    """Convert an iterable of '#RRGGBB' codes into an (N, 3) float64 Lab array."""
+    codes = [h.strip().lstrip("#") for h in hexes]
+    if any(len(h) != 6 for h in codes):
+        raise ValueError("expected 6-digit hex colours")
+    rgb = np.frombuffer(bytes.fromhex("".join(codes)), dtype=np.uint8).reshape(-1, 3) / 255.0
+
+    # sRGB -> XYZ -> Lab (D65)
+    rgb = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    t = (rgb @ _RGB_TO_XYZ.T) / _WHITE_D65
+    f = np.where(t > 0.008856, np.cbrt(t), 7.787 * t + 16 / 116)
+    fx, fy, fz = f[:, 0], f[:, 1], f[:, 2]
+    return np.column_stack((116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)))
 
 
 def _delta_e76(c1: str, c2: str) -> float:
-    r1, g1, b1 = _hex_to_rgb(c1); L1, a1, b1_ = _rgb_to_lab(r1, g1, b1)
-    r2, g2, b2 = _hex_to_rgb(c2); L2, a2, b2_ = _rgb_to_lab(r2, g2, b2)
-    return ((L1 - L2) ** 2 + (a1 - a2) ** 2 + (b1_ - b2_) ** 2) ** 0.5
+    lab = _hex_to_lab_vec((c1, c2))
+    return float(np.linalg.norm(lab[0] - lab[1]))
 
 
 def _lighten_or_darken(hexs: str, factor: float = 0.15) -> str:
@@ -116,15 +125,28 @@ def _lighten_or_darken(hexs: str, factor: float = 0.15) -> str:
         r += (1 - r) * factor; g += (1 - g) * factor; b += (1 - b) * factor
     else:
         r *= (1 + factor); g *= (1 + factor); b *= (1 + factor)
-    return "#{:02X}{:02X}{:02X}".format(int(r * 255), int(g * 255), int(b * 255))
+    ri, gi, bi = (min(max(int(c * 255), 0), 255) for c in (r, g, b))
+    return "#{:06X}".format((ri << 16) | (gi << 8) | bi)
+
+
+# Pairs with ΔE76 < 20 stay below ~1.02 in sRGB L1 distance (channels in 0..1,
+# worst case around saturated greens); beyond this margin they are never similar.
+_SRGB_L1_CLEARLY_DIFFERENT = 1.5
 
 
 def _similar(c1: str, c2: str, delta: float = 20.0) -> bool:
     """Rough similarity check using ΔE76; ~10–20 is 'perceptible'."""
+    if c1.strip().lower() == c2.strip().lower():
+        return True
     try:
+        # Cheap sRGB pre-check skips the Lab conversion for obvious clashes.
+        r1, g1, b1 = _hex_to_rgb(c1)
+        r2, g2, b2 = _hex_to_rgb(c2)
+        if delta <= 20.0 and abs(r1 - r2) + abs(g1 - g2) + abs(b1 - b2) > _SRGB_L1_CLEARLY_DIFFERENT:
+            return False
         return _delta_e76(c1, c2) < delta
     except Exception:
-        return c1.lower() == c2.lower()
+        return False
 
 
 # -------------------- Public API --------------------
@@ -149,27 +171,31 @@ def pick_match_colors(
       3) If still similar, darken the away slightly
 
     Falls back to deterministic colours if a team is not found in the DB.
+    Results are cached per match; ids are normalized so None and "" share a key.
     """
+    return _pick_match_colors_cached(
+        home_name, away_name,
+        "" if home_id is None else str(home_id),
+        "" if away_id is None else str(away_id),
+    )
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _pick_match_colors_cached(home_name: str, away_name: str, home_id: str, away_id: str) -> MatchPalette:
     # Try to fetch FIFA abbreviations (ARG, BRA, …) from cached flags
     abbr_home = abbr_away = None
     try:
-        df_flags: pd.DataFrame = get_team_flags()
-        if home_id is not None:
-            hit = df_flags.loc[df_flags["TeamId"].astype(str) == str(home_id)]
-            if not hit.empty:
-                abbr_home = hit.iloc[0]["AbbreviationName"]
-        if away_id is not None:
-            hit = df_flags.loc[df_flags["TeamId"].astype(str) == str(away_id)]
-            if not hit.empty:
-                abbr_away = hit.iloc[0]["AbbreviationName"]
+        abbr_map = abbr_by_teamid()
+        abbr_home = abbr_map.get(home_id) if home_id else None
+        abbr_away = abbr_map.get(away_id) if away_id else None
     except Exception:
         pass
 
-    df_db = load_colors_db()
+    by_abbr, by_name = load_colors_db()
 
     # Look up palettes in DB (abbr first, then name)
-    pal_home = db_lookup_palette(df_db, home_name, abbr_home)
-    pal_away = db_lookup_palette(df_db, away_name, abbr_away)
+    pal_home = db_lookup_palette(by_abbr, by_name, home_name, abbr_home)
+    pal_away = db_lookup_palette(by_abbr, by_name, away_name, abbr_away)
 
     # Deterministic, nice-looking fallback if a team isn't in the DB
     if pal_home is None:
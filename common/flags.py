@@ -32,32 +32,34 @@ def get_team_flags(season_id: str = SEASONID) -> pd.DataFrame:
     data = fifa_get(f"/competitions/teams/{season_id}")   # language handled by fifa_get
     results = data.get("Results", []) or []
 
-    rows = []
-    for t in results:
+    # Fill one list per column and build the frame once; every value is
+    # already a str, so no per-column dtype re-casting is needed afterwards.
+    n = len(results)
+    ids, names, abbrs, confs, flags = [""] * n, [""] * n, [""] * n, [""] * n, [""] * n
+    for i, t in enumerate(results):
         abbr = t.get("Abbreviation", "") or ""
-        team_name = t.get("ShortClubName", "") or t.get("TeamName", "") or ""
-        rows.append(
-            {
-                "TeamId": str(t.get("IdTeam", "")),
-                "TeamName": team_name,
-                "AbbreviationName": abbr,
-                "Confederation": str(t.get("IdConfederation", "")),
-                "Flag": f"{FLAG_BASE}/{abbr}" if abbr else "",
-            }
-        )
-
-    df = pd.DataFrame(rows)
-    if not df.empty:
-        for c in ["TeamId", "TeamName", "AbbreviationName", "Confederation", "Flag"]:
-            df[c] = df[c].astype(str)
-    return df
+        ids[i] = str(t.get("IdTeam", ""))
+        names[i] = t.get("ShortClubName", "") or t.get("TeamName", "") or ""
+        abbrs[i] = abbr
+        confs[i] = str(t.get("IdConfederation", ""))
+        flags[i] = f"{FLAG_BASE}/{abbr}" if abbr else ""
+
+    return pd.DataFrame(
+        {
+            "TeamId": ids,
+            "TeamName": names,
+            "AbbreviationName": abbrs,
+            "Confederation": confs,
+            "Flag": flags,
+        }
+    )
 
 
 def flags_by_teamid(df_flags: pd.DataFrame) -> Dict[str, str]:
-    """Return a {TeamId -> FlagURL} mapping."""
+    """Return a {TeamId -> FlagURL} mapping (TeamId is already str from `get_team_flags`)."""
     if df_flags.empty:
         return {}
-    return dict(zip(df_flags["TeamId"].astype(str), df_flags["Flag"]))
+    return dict(zip(df_flags["TeamId"], df_flags["Flag"]))
 
 
 def flag_url_from_abbr(abbreviation: Optional[str]) -> str:
@@ -66,15 +68,29 @@ def flag_url_from_abbr(abbreviation: Optional[str]) -> str:
 
 # ---------- Simple, cached lookups you can import from pages ----------
 
-@st.cache_data(ttl=86400, show_spinner=False)
+@st.cache_resource(ttl=86400, show_spinner=False)
 def get_flags_map(season_id: str = SEASONID) -> Dict[str, str]:
     """
     Cached {TeamId -> FlagURL} map for fast lookups in pages.
+
+    Held as a shared resource (built once per process, no copy per call),
+    so callers must treat it as read-only.
     """
     df = get_team_flags(season_id)
     return flags_by_teamid(df)
 
 
+@st.cache_data(ttl=86400, show_spinner=False)
+def abbr_by_teamid(season_id: str = SEASONID) -> Dict[str, str]:
+    """
+    Cached {TeamId -> AbbreviationName} map (e.g. '43922' -> 'ARG').
+    """
+    df = get_team_flags(season_id)
+    if df.empty:
+        return {}
+    return dict(zip(df["TeamId"], df["AbbreviationName"]))
+
+
 def get_flag_url_by_team_id(team_id: str, season_id: str = SEASONID) -> str:
     """
     Return the square flag URL for a given TeamId ('' if not found).
@@ -22,6 +22,7 @@ from typing import Iterable, Tuple, Optional, Dict
 import numpy as np
 import pandas as pd
 import re
+from scipy import signal
 from common.colors import pick_match_colors
 
 # --- Constants ---
@@ -31,9 +32,27 @@ ATTEMPT_WEIGHT    = 1.0         # weight assigned to attempts
 GOAL_WEIGHT       = 2.0         # weight assigned to goals (higher impact)
 TOP_N_PLAYERS     = 8           # default top-N players to display in charts
 
+# EWMA smoothing factor for the common case (dt = 1 minute, tau = SMOOTH_TAU_MIN)
+_ALPHA_DEFAULT    = 1.0 - np.exp(-1.0 / SMOOTH_TAU_MIN)
+
 # Whitelisted event descriptions considered 'attacking' for most plots
 WHITELIST_ATTACK  = {"Attempt at Goal", "Goal!"}
 
+# Precompiled patterns used by `parse_time_to_seconds` (called once per event)
+_RE_PT_M     = re.compile(r"PT(\d+)M")
+_RE_PT_MS    = re.compile(r"M(\d+)S")
+_RE_PT_S     = re.compile(r"PT(\d+)S")
+_RE_SPLIT    = re.compile(r"[:']")
+_RE_NONDIGIT = re.compile(r"\D")
+_RE_INT      = re.compile(r"\d+")
+
+# Common clean formats ('PT12M34S', 'PT34S', '12:34', '12') handled in one
+# vectorized `str.extract` pass by `_vec_parse_time`
+_RE_VEC_TIME = re.compile(r"^PT(?:(\d+)M)?(?:(\d+)S)?$|^(\d+):(\d+)$|^(\d+)$")
+
+# Curly quotes -> ASCII equivalents, applied with a single str.translate
+_QUOTES_TABLE = str.maketrans({"’": "'", "′": "'", "“": '"', "”": '"'})
+
 
 # ---------- Small helpers ----------
 def teams_ordered(series_or_iter: Iterable[str]) -> Tuple[str, str]:
@@ -63,17 +82,17 @@ def parse_time_to_seconds(val) -> float:
     s = str(val).strip()
 
     # Normalize common curly quotes to ASCII equivalents so regexes work.
-    s = s.replace("’", "'").replace("′", "'").replace("“", '"').replace("”", '"')
+    s = s.translate(_QUOTES_TABLE)
 
     # 1) ISO-like duration format: e.g. 'PT12M34S' or 'PT34S'
     #    - Look for 'PT' prefix and 'S' suffix; extract minutes and seconds robustly.
     if s.startswith("PT") and s.endswith("S"):
         # 'm' matches minutes (PT<num>M) if present
-        m = re.search(r'PT(\d+)M', s)
+        m = _RE_PT_M.search(s)
         # 'sec' matches the seconds after an 'M' (M<num>S)
-        sec = re.search(r'M(\d+)S', s)
+        sec = _RE_PT_MS.search(s)
         if not m:  # e.g., 'PT34S' has only seconds
-            sec_only = re.search(r'PT(\d+)S', s)
+            sec_only = _RE_PT_S.search(s)
             return float(int(sec_only.group(1))) if sec_only else 0.0
         minutes = int(m.group(1))
         seconds = int(sec.group(1)) if sec else 0
@@ -82,25 +101,25 @@ def parse_time_to_seconds(val) -> float:
     # 2) 'mm:ss' or "mm'ss" style (also accept noisy characters)
     if ":" in s or "'" in s:
         # Split once on colon or apostrophe to keep any trailing junk ignored.
-        parts = re.split(r"[:']", s, maxsplit=1)
+        parts = _RE_SPLIT.split(s, maxsplit=1)
         # Remove non-digits to be forgiving of extra characters.
-        m_str = re.sub(r"\D", "", parts[0]) if parts else "0"
-        sec_str = re.sub(r"\D", "", parts[1]) if len(parts) > 1 else "0"
+        m_str = _RE_NONDIGIT.sub("", parts[0]) if parts else "0"
+        sec_str = _RE_NONDIGIT.sub("", parts[1]) if len(parts) > 1 else "0"
         minutes = int(m_str) if m_str else 0
         seconds = int(sec_str) if sec_str else 0
         return float(minutes * 60 + seconds)
 
     # 3) Seconds-only patterns like '29"' or '29sec'
     if '"' in s or "sec" in s.lower():
-        sec_str = re.sub(r"\D", "", s)
+        sec_str = _RE_NONDIGIT.sub("", s)
         return float(int(sec_str)) if sec_str else 0.0
 
     # 4) Pure integer -> treat as minutes (common shorthand)
-    if re.fullmatch(r"\d+", s):
+    if _RE_INT.fullmatch(s):
         return float(int(s) * 60)
 
     # 5) Last resort: extract any numbers found. If two numbers -> minute,second
-    nums = re.findall(r"\d+", s)
+    nums = _RE_INT.findall(s)
     if len(nums) >= 2:
         return float(int(nums[0]) * 60 + int(nums[1]))
     if len(nums) == 1:
@@ -110,24 +129,56 @@ def parse_time_to_seconds(val) -> float:
     return 0.0
 
 
+def _vec_parse_time(series: pd.Series) -> pd.Series:
+    """
+    Vectorized `parse_time_to_seconds` for a whole column.
+    Clean formats are parsed with a single regex extract; anything else
+    (curly quotes, noisy text, NaN) falls back to the scalar parser.
+    """
+    m = series.astype(str).str.strip().str.extract(_RE_VEC_TIME).astype(float)
+
+    # Groups: 0/1 = PT minutes/seconds, 2/3 = mm:ss, 4 = bare minutes
+    g = m.fillna(0.0)
+    sec = g[0] * 60 + g[1] + g[2] * 60 + g[3] + g[4] * 60
+    sec.index = series.index
+
+    unmatched = m.isna().all(axis=1).to_numpy()
+    if unmatched.any():
+        sec[unmatched] = series[unmatched].apply(parse_time_to_seconds)
+    return sec
+
+
 def ewma(x: np.ndarray, dt_minutes: float = 1.0, tau_minutes: float = 3.0) -> np.ndarray:
-    """Simple causal EWMA with time step dt and time constant tau (in minutes)."""
-    # Return early for empty input (avoid index errors below)
-    if len(x) == 0:
+    """
+    Simple causal EWMA with time step dt and time constant tau (in minutes).
+    Smooths along the last axis, so a stacked (k, N) array of series is
+    filtered in a single call.
+    """
+    # Return early for empty input (avoid index errors below). A contiguous
+    # float64 buffer lets lfilter run its inner loop without strided copies.
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    if x.shape[-1] == 0:
         return x
 
+    # A constant series is its own EWMA (y[0] == x[0] and nothing changes),
+    # which covers the common all-zero rows of quiet teams/matches.
+    if (x == x[..., :1]).all():
+        return x.copy()
+
     # Compute the EWMA smoothing factor (alpha) from the time constant tau.
     # alpha in (0,1] where larger alpha means faster response to new values.
-    alpha = 1.0 - np.exp(-dt_minutes / max(tau_minutes, 1e-9))
-
-    # Prepare output array with float dtype and initialize with first value.
-    y = np.zeros_like(x, dtype=float)
-    y[0] = x[0]
+    # The per-minute default is precomputed at import time.
+    if dt_minutes == 1.0 and tau_minutes == SMOOTH_TAU_MIN:
+        alpha = _ALPHA_DEFAULT
+    else:
+        alpha = 1.0 - np.exp(-dt_minutes / max(tau_minutes, 1e-9))
 
     # Recursive causal update: y[i] = alpha * x[i] + (1-alpha) * y[i-1]
-    # This implements a simple IIR low-pass filter that smooths short spikes.
-    for i in range(1, len(x)):
-        y[i] = alpha * x[i] + (1 - alpha) * y[i - 1]
+    # This is a first-order IIR low-pass filter, so it runs through
+    # `scipy.signal.lfilter` (a C loop) instead of a Python for-loop. The
+    # initial state is chosen so that y[0] == x[0].
+    zi = (1.0 - alpha) * x[..., :1]
+    y, _ = signal.lfilter([alpha], [1.0, -(1.0 - alpha)], x, axis=-1, zi=zi)
     return y
 
 
@@ -154,22 +205,29 @@ def build_attack_df(df_events: pd.DataFrame, match_row: pd.Series, squads: Optio
       - 'TeamName' mapped from TeamId
       - 'PlayerName' merged from squads if available
     """
-    # Work on a copy to avoid mutating the callers data
-    df = df_events.copy()
-
-    # Filter to only attacking actions (whitelist). This ensures downstream
+    # Filter to only attacking actions (whitelist) first, then copy just that
+    # subset so the caller's data is never mutated. This ensures downstream
     # charts focus on attempts and goals.
-    df = df[df["Description"].isin(WHITELIST_ATTACK)].copy()
-
-    # Map TeamId -> TeamName using the selected match_row values. Converting
-    # TeamId to string makes the mapping robust to numeric vs string IDs.
-    names = {
-        str(match_row["HomeId"]): str(match_row["HomeName"]),
-        str(match_row["AwayId"]): str(match_row["AwayName"]),
-    }
-    df["TeamId"] = df["TeamId"].astype(str)
+    mask = df_events["Description"].isin(WHITELIST_ATTACK)
+    df = df_events.loc[mask].copy()
+
+    # Map TeamId -> TeamName using the selected match_row values. The two
+    # keys are cast to the column's kind (int for numeric IDs, str otherwise)
+    # instead of converting every row to string.
+    home_id, away_id = match_row["HomeId"], match_row["AwayId"]
+    home_name, away_name = str(match_row["HomeName"]), str(match_row["AwayName"])
+    cast = int if pd.api.types.is_numeric_dtype(df["TeamId"]) else str
+    try:
+        names = {cast(home_id): home_name, cast(away_id): away_name}
+    except (TypeError, ValueError):
+        names = {}
     df["TeamName"] = df["TeamId"].map(names)
 
+    # Mixed or unexpected ID types: fall back to comparing as strings once.
+    if df["TeamName"].isna().any():
+        df["TeamId"] = df["TeamId"].astype(str)
+        df["TeamName"] = df["TeamId"].map({str(home_id): home_name, str(away_id): away_name})
+
     # If squad/player information is provided, merge PlayerName into the
     # events DataFrame so charts can show player labels.
     if squads is not None and not squads.empty:
@@ -183,15 +241,21 @@ def build_attack_df(df_events: pd.DataFrame, match_row: pd.Series, squads: Optio
     # Compute time-related features used by plots:
     #  - 'sec' = absolute seconds parsed from the possibly messy 'MatchMinute'
     #  - 'minute' = rounded minute integer used for per-minute aggregation
+    #    (int16 and float32 weights keep the groupby/pivot inputs compact)
     #  - 'label' = textual mm' label (e.g., "02'") for annotating goals
-    df["sec"] = df["MatchMinute"].apply(parse_time_to_seconds)
-    df["minute"] = (df["sec"] / 60.0).round().astype(int)
-    df["label"] = (df["sec"] // 60).astype(int).map(lambda m: f"{int(m):02d}'")
+    df["sec"] = _vec_parse_time(df["MatchMinute"])
+    df["minute"] = (df["sec"] / 60.0).round().astype(np.int16)
+    df["label"] = (df["sec"] // 60).astype(int).map("{:02d}'".format)
+
+    # Assign weights: goals count more than attempts. The whitelist filter
+    # above is exact-case, so a plain equality check identifies goals.
+    is_goal = df["Description"].to_numpy() == "Goal!"
+    df["w"] = np.where(is_goal, np.float32(GOAL_WEIGHT), np.float32(ATTEMPT_WEIGHT))
 
-    # Assign weights: goals count more than attempts. The lowercase comparison
-    # protects against inconsistent capitalization in the data source.
-    desc_l = df["Description"].astype(str).str.strip().str.lower()
-    df["w"] = np.where(desc_l.isin({"goal", "goal!"}), GOAL_WEIGHT, ATTEMPT_WEIGHT)
+    # Both columns have a tiny fixed vocabulary after filtering; categoricals
+    # let the per-minute groupby/pivot work on integer codes.
+    df["TeamName"] = pd.Categorical(df["TeamName"], categories=list(dict.fromkeys((home_name, away_name))))
+    df["Description"] = pd.Categorical(df["Description"], categories=["Attempt at Goal", "Goal!"])
 
     return df
 
@@ -202,34 +266,26 @@ def build_minute_matrix(df_attack: pd.DataFrame, match_row: pd.Series) -> pd.Dat
     """
     teams = (str(match_row["HomeName"]), str(match_row["AwayName"]))
 
-    # Baseline minutes range: futsal games are short, so 0..40 covers typical
-    # playtime; adjust if you expect extra time.
-    mins = pd.DataFrame({"minute": np.arange(0, 40 + 1, 1, dtype=int)})
-
-    # Sum weights per minute and per team. This creates rows like
-    # (minute, TeamName, w) with the aggregated weight.
-    tmp = df_attack.groupby(["minute", "TeamName"], as_index=False)["w"].sum()
-
-    # Merge Team A (home) values on the minutes baseline, leaving NaN where
-    # a team had no events that minute.
-    mat = mins.merge(
-        tmp[tmp["TeamName"] == teams[0]][["minute", "w"]].rename(columns={"w": "team_a"}),
-        on="minute",
-        how="left",
+    # Sum weights per minute and per team in a single pivot, then reindex on
+    # the baseline minutes range: futsal games are short, so 0..40 covers
+    # typical playtime; adjust if you expect extra time. Minutes/teams with
+    # no events become zeros so plotting code can operate without checks.
+    mat = (
+        df_attack.pivot_table(index="minute", columns="TeamName", values="w",
+                              aggfunc="sum", fill_value=0.0, observed=False)
+        .reindex(pd.Index(np.arange(0, 40 + 1, dtype=np.int16), name="minute"), fill_value=0.0)
+        .rename(columns={teams[0]: "team_a", teams[1]: "team_b"})
+        .reset_index()
     )
-
-    # Merge Team B (away) values similarly and fill missing with zeros so
-    # plotting code can operate without further checks.
-    mat = mat.merge(
-        tmp[tmp["TeamName"] == teams[1]][["minute", "w"]].rename(columns={"w": "team_b"}),
-        on="minute",
-        how="left",
+    for c in ("team_a", "team_b"):
+        if c not in mat:
+            mat[c] = 0.0
+    return mat[["minute", "team_a", "team_b"]].astype(
+        {"minute": np.int16, "team_a": np.float32, "team_b": np.float32}
     )
-    mat[["team_a", "team_b"]] = mat[["team_a", "team_b"]].fillna(0.0)
-    return mat
 
 
 def build_goals_only(df_attack: pd.DataFrame) -> pd.DataFrame:
     """Return only goals with the prepared 'minute' and 'label' fields."""
-    desc_l = df_attack["Description"].str.strip().str.lower()
-    return df_attack.loc[desc_l.isin({"goal", "goal!"})].copy()
+    # `df_attack` comes from `build_attack_df`, whose whitelist is exact-case.
+    return df_attack.loc[df_attack["Description"].to_numpy() == "Goal!"].copy()
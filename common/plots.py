@@ -9,19 +9,28 @@ the visualizations used by the app:
     - cumulative attack rate
 
 The plotting functions accept pandas DataFrames and return matplotlib Axes
-objects so they can be composed into larger figures in the pages.
+objects so they can be composed into larger figures in the pages. The two
+overview bar charts also have Plotly variants (`*_plotly`), which return a
+`go.Figure` that the browser renders from a small JSON spec.
 """
 
 #Import libraries
 from __future__ import annotations
-from typing import Optional, Tuple, Dict
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Optional, Tuple, Dict, Mapping
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import matplotlib as mpl
+import streamlit as st
+from matplotlib.axes import Axes
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
 from matplotlib.patches import Patch, Circle, Rectangle
 import matplotlib.patheffects as pe
+import plotly.graph_objects as go
 
 from common.metrics import (
         HALFTIME_MINUTE, SMOOTH_TAU_MIN, ATTEMPT_WEIGHT, GOAL_WEIGHT, TOP_N_PLAYERS,
@@ -30,15 +39,41 @@ from common.metrics import (
 
 DEFAULT_FIGSIZE = (6.6, 2.6)  # reasonable default figure size for the compact UI
 
-def _new_ax(ax=None):
+def session_fig(name: str, figsize=None, constrained_layout: bool = False, ncols: int = 1, nrows: int = 1):
+    """Return a (fig, ax) pair kept in `st.session_state`, cleared for reuse.
+
+    Building a Figure/Axes costs far more than drawing the few artists these
+    charts need, so each named chart keeps one pair per session across
+    reruns. The figure is not registered with pyplot, so it needs no
+    `plt.close` and is freed together with the session. With `ncols > 1`
+    or `nrows > 1` the second item is the axes array, as from `subplots`.
+    """
+    key = f"_fig_{name}"
+    cached = st.session_state.get(key)
+    if cached is None:
+        fig = Figure(figsize=figsize, constrained_layout=constrained_layout)
+        ax = fig.subplots(nrows, ncols)
+        st.session_state[key] = (fig, ax)
+    else:
+        fig, ax = cached
+        for a in np.ravel(ax):
+            a.clear()
+    return fig, ax
+
+def _new_ax(ax=None, name: str = "momentum"):
     """Return a compact figure/axes when ax is None; otherwise reuse the axes."""
     if ax is None:
-        fig, ax = plt.subplots(figsize=DEFAULT_FIGSIZE, constrained_layout=True)
+        fig, ax = session_fig(name, figsize=DEFAULT_FIGSIZE, constrained_layout=True)
     else:
         fig = ax.figure
     return fig, ax
 
 # --- color helpers for outlines on light colors ---
+# Only a few dozen team colors exist, so these are memoized per hex string.
+_EDGE_KW_LIGHT = MappingProxyType({"edgecolor": "black", "linewidth": 1.0})
+_EDGE_KW_NONE = MappingProxyType({})
+
+@lru_cache(maxsize=256)
 def _hex_to_rgb01(hexs: str):
     h = hexs.strip().lstrip("#")
     r = int(h[0:2], 16) / 255.0
@@ -46,6 +81,7 @@ def _hex_to_rgb01(hexs: str):
     b = int(h[4:6], 16) / 255.0
     return r, g, b
 
+@lru_cache(maxsize=256)
 def _is_light_color(hexs: str, thr: float = 0.90) -> bool:
     """Perceived luminance threshold (Y) to decide if we need an outline."""
     try:
@@ -55,9 +91,34 @@ def _is_light_color(hexs: str, thr: float = 0.90) -> bool:
     except Exception:
         return False
 
-def _edge_kw_for(hexs: str) -> dict:
-    """Return edgecolor/linewidth kwargs for bars when color is very light."""
-    return {"edgecolor": "black", "linewidth": 1.0} if _is_light_color(hexs) else {}
+# ASCII -> hex nibble value (-1 for anything that is not a hex digit).
+_HEX_NIBBLE = np.full(128, -1, dtype=np.int16)
+for _c in "0123456789abcdefABCDEF":
+    _HEX_NIBBLE[ord(_c)] = int(_c, 16)
+del _c
+_LUMA = np.array([0.2126, 0.7152, 0.0722])
+
+def _are_light_colors(hexes, thr: float = 0.90) -> np.ndarray:
+    """Vectorized `_is_light_color` over many hex strings (boolean mask)."""
+    codes = np.array([str(h).strip().lstrip("#")[:6] for h in hexes], dtype="U6")
+    # Each U6 item is six UCS-4 code points; short codes are NUL padded.
+    chars = codes.view(np.uint32).reshape(len(codes), 6)
+    nib = _HEX_NIBBLE[np.minimum(chars, 127)]
+    valid = (nib >= 0).all(axis=1)
+    rgb = (nib[:, 0::2] * 16 + nib[:, 1::2]) / 255.0
+    return valid & (rgb @ _LUMA >= thr)
+
+@lru_cache(maxsize=256)
+def _edge_kw_for(hexs: str) -> Mapping[str, object]:
+    """Return edgecolor/linewidth kwargs for bars when color is very light.
+
+    The mapping is shared between calls, hence read-only; expand it with `**`.
+    """
+    return _EDGE_KW_LIGHT if _is_light_color(hexs) else _EDGE_KW_NONE
+
+def _edge_colors(hexes) -> list:
+    """Per-bar edgecolors: black around very light colors, none otherwise."""
+    return np.where(_are_light_colors(hexes), "black", "none").tolist()
 
 def _outline_line_if_light(line_obj, hexs: str):
     """Give a black stroke outline to very light lines so they’re visible."""
@@ -70,12 +131,12 @@ def _outline_line_if_light(line_obj, hexs: str):
 def plot_events_count_bar(counts: pd.DataFrame,
                           match_row: pd.Series,
                           colors_map: Optional[Dict[str, str]] = None,
-                          ax: Optional[plt.Axes] = None,
+                          ax: Optional[Axes] = None,
                           show_legend: bool = True,
                           ylabel: str = "",
-                          title: str = "") -> plt.Axes:
+                          title: str = "") -> Axes:
     if ax is None:
-        fig, ax = plt.subplots()
+        fig, ax = session_fig("events_count")
     colors = colors_map or {}
 
     home, away = str(match_row["HomeName"]), str(match_row["AwayName"])
@@ -90,8 +151,10 @@ def plot_events_count_bar(counts: pd.DataFrame,
     col_home = colors.get(home, "#777777")
     col_away = colors.get(away, "#999999")
 
-    ax.bar([0], [y_home], color=col_home, label=home, **_edge_kw_for(col_home))
-    ax.bar([1], [y_away], color=col_away, label=away, **_edge_kw_for(col_away))
+    # One bar call for both teams; very light colors get a black outline.
+    bars = ax.bar([0, 1], [y_home, y_away], color=[col_home, col_away],
+                  edgecolor=_edge_colors([col_home, col_away]))
+    bars[0].set_label(home); bars[1].set_label(away)
     ax.set_xticks([0, 1], [home, away])
     ax.set_ylabel(ylabel)
     ax.set_title(title)
@@ -104,11 +167,11 @@ def plot_event_distribution_grouped(dist: pd.DataFrame,
                                     match_row: pd.Series,
                                     events: Optional[list] = None,
                                     colors_map: Optional[Dict[str, str]] = None,
-                                    ax: Optional[plt.Axes] = None,
+                                    ax: Optional[Axes] = None,
                                     show_legend: bool = True,
-                                    title: str = "") -> plt.Axes:
+                                    title: str = "") -> Axes:
     if ax is None:
-        fig, ax = plt.subplots()
+        fig, ax = session_fig("event_distribution")
     colors = colors_map or {}
     if events is None:
         events = ["Attempt at Goal", "Foul", "Goal!", "Assist", "Corner"]
@@ -132,8 +195,14 @@ def plot_event_distribution_grouped(dist: pd.DataFrame,
     col_home = colors.get(home, "#777777")
     col_away = colors.get(away, "#999999")
 
-    ax.bar(x - w/2, home_vals, width=w, color=col_home, align="center", label=home, **_edge_kw_for(col_home))
-    ax.bar(x + w/2, away_vals, width=w, color=col_away, align="center", label=away, **_edge_kw_for(col_away))
+    # Home and away bars of every event drawn by a single bar call.
+    n = len(events)
+    edge_home, edge_away = _edge_colors([col_home, col_away])
+    bars = ax.bar(np.r_[x - w/2, x + w/2], home_vals + away_vals, width=w,
+                  color=[col_home] * n + [col_away] * n, align="center",
+                  edgecolor=[edge_home] * n + [edge_away] * n)
+    if n:
+        bars[0].set_label(home); bars[n].set_label(away)
 
     ax.set_xticks(x, events, rotation=0)
     ax.set_ylabel("")
@@ -142,6 +211,60 @@ def plot_event_distribution_grouped(dist: pd.DataFrame,
 
     return ax
 
+# --- Plotly variants of the overview bar charts ---
+_PLOTLY_BAR_LAYOUT = dict(
+    width=520,
+    height=220,
+    margin=dict(l=10, r=10, t=10, b=10),
+    showlegend=False,
+    plot_bgcolor="white",
+    font=dict(size=11),
+)
+
+def _plotly_edges(cols) -> list:
+    """Per-bar outline widths: 1px black around very light colors."""
+    return np.where(_are_light_colors(cols), 1.0, 0.0).tolist()
+
+def plot_events_count_bar_plotly(counts: pd.DataFrame,
+                                 match_row: pd.Series,
+                                 colors_map: Optional[Dict[str, str]] = None) -> go.Figure:
+    """Plotly version of `plot_events_count_bar` (one bar per team)."""
+    colors = colors_map or {}
+    home, away = str(match_row["HomeName"]), str(match_row["AwayName"])
+    totals = counts.drop_duplicates("TeamName").set_index("TeamName")["TotalEvents"]
+    cols = [colors.get(home, "#777777"), colors.get(away, "#999999")]
+
+    fig = go.Figure(go.Bar(
+        x=[home, away],
+        y=[float(totals.get(home, 0)), float(totals.get(away, 0))],
+        marker=dict(color=cols, line=dict(color="black", width=_plotly_edges(cols))),
+        hovertemplate="%{x}: %{y:.0f}<extra></extra>",
+    ))
+    fig.update_layout(**_PLOTLY_BAR_LAYOUT)
+    return fig
+
+def plot_event_distribution_grouped_plotly(dist: pd.DataFrame,
+                                           match_row: pd.Series,
+                                           events: Optional[list] = None,
+                                           colors_map: Optional[Dict[str, str]] = None) -> go.Figure:
+    """Plotly version of `plot_event_distribution_grouped` (one group per event)."""
+    colors = colors_map or {}
+    if events is None:
+        events = ["Attempt at Goal", "Foul", "Goal!", "Assist", "Corner"]
+    home, away = str(match_row["HomeName"]), str(match_row["AwayName"])
+    table = dist.drop_duplicates("TeamName").set_index("TeamName").reindex(index=[home, away], columns=events, fill_value=0).fillna(0)
+
+    fig = go.Figure()
+    for team, col in ((home, colors.get(home, "#777777")), (away, colors.get(away, "#999999"))):
+        fig.add_trace(go.Bar(
+            name=team,
+            x=events,
+            y=table.loc[team].to_numpy(),
+            marker=dict(color=col, line=dict(color="black", width=_plotly_edges([col])[0])),
+            hovertemplate=f"{team}<br>%{{x}}: %{{y:.0f}}<extra></extra>",
+        ))
+    fig.update_layout(barmode="group", bargap=0.16, **_PLOTLY_BAR_LAYOUT)
+    return fig
 
 # --- Momentum (mirror bars) ----------------
 def plot_momentum(minute_df: pd.DataFrame,
@@ -149,8 +272,8 @@ def plot_momentum(minute_df: pd.DataFrame,
                   goals_df: pd.DataFrame,
                   halftime_minute: int = HALFTIME_MINUTE,
                   colors_map: Optional[Dict[str, str]] = None,
-                  ax: Optional[plt.Axes] = None,
-                  show_legend: bool = False) -> plt.Axes:
+                  ax: Optional[Axes] = None,
+                  show_legend: bool = False) -> Axes:
     colors = colors_map or {}
     fig, ax = _new_ax(ax)
 
@@ -160,9 +283,9 @@ def plot_momentum(minute_df: pd.DataFrame,
 
     # Prepare arrays for plotting. 'up' holds the home-team per-minute weight
     # and 'dn' holds the away-team weight negated so bars mirror below zero.
-    x = minute_df["minute"].values
-    up = minute_df["team_a"].values
-    dn = -minute_df["team_b"].values
+    x = minute_df["minute"].to_numpy()
+    up = minute_df["team_a"].to_numpy()
+    dn = -minute_df["team_b"].to_numpy()
 
     # Draw the mirror bars for each minute. Use `_edge_kw_for` to add a
     # thin black outline when the color is very light so bars remain visible.
@@ -190,35 +313,50 @@ def plot_momentum(minute_df: pd.DataFrame,
         step_y_px = 6
         bump_px = 6
 
+        # (team_a, team_b) bar values per minute, built once so every label
+        # anchor is a dict lookup instead of a boolean scan of minute_df.
+        # Minutes outside the matrix (e.g. extra time) anchor at zero.
+        bar_at = dict(zip(minute_df["minute"].tolist(),
+                          zip(minute_df["team_a"].tolist(), minute_df["team_b"].tolist())))
+        no_bar = (0.0, 0.0)
+
         prev_minute = {home: None, away: None}
         for idx, team in enumerate((home, away)):
             # sign determines whether annotations appear above (home) or
             # below (away) the corresponding bar.
             sign = 1 if idx == 0 else -1
-            col = "team_a" if idx == 0 else "team_b"
             rows = goals_df.loc[goals_df["TeamName"] == team].sort_values("minute")
 
-            # Group by minute so multiple goals in the same minute are handled
-            # together and stacked with small offsets.
-            for m, sub in rows.groupby("minute", sort=False):
+            mins = rows["minute"].to_numpy()
+            all_labels = rows["label"].to_numpy(dtype=object)
+
+            # Segment the minute-sorted rows so multiple goals in the same
+            # minute are handled together and stacked with small offsets.
+            uniq, starts = np.unique(mins, return_index=True)
+            ends = np.r_[starts[1:], len(mins)]
+            for m, s, e in zip(uniq.tolist(), starts.tolist(), ends.tolist()):
                 # Value of the bar at minute m (used to anchor the label)
-                bar_val = float(minute_df.loc[minute_df["minute"] == m, col].values[0])
+                bar_val = float(bar_at.get(m, no_bar)[idx])
                 tip_y = sign * (abs(bar_val) + tip_pad)
 
                 # Small bump if consecutive goals are close in time
                 extra = bump_px if (prev_minute[team] is not None and (m - prev_minute[team]) <= 1) else 0
                 prev_minute[team] = m
 
-                for k, (_, r) in enumerate(sub.iterrows()):
-                    # r['label'] is in "mm'" form; suffix with (G) to indicate goal
-                    txt = f"{r.get('label','')}".strip() + " (G)"
-                    y_off = sign * (base_y_px + extra + k * step_y_px)
-                    x_off = jitter_px[k % len(jitter_px)]
+                # Stack labels for goals in the same minute: offsets for all
+                # of them are computed at once from plain arrays.
+                labels = all_labels[s:e]
+                ks = np.arange(len(labels))
+                y_offs = sign * (base_y_px + extra + ks * step_y_px)
+                x_offs = np.asarray(jitter_px)[ks % len(jitter_px)]
+                for k in range(len(labels)):
+                    # labels are in "mm'" form; suffix with (G) to indicate goal
+                    txt = f"{labels[k]}".strip() + " (G)"
                     ax.annotate(
                         txt,
                         xy=(float(m), tip_y),
                         xycoords="data",
-                        xytext=(x_off, y_off),
+                        xytext=(int(x_offs[k]), int(y_offs[k])),
                         textcoords="offset points",
                         ha="center",
                         va="bottom" if sign > 0 else "top",
@@ -232,27 +370,29 @@ def plot_momentum(minute_df: pd.DataFrame,
 # --- Smoothed lines (EWMA) ----------------
 def plot_smoothed(minute_df: pd.DataFrame,
                   teams: Tuple[str, str],
-                  ax: Optional[plt.Axes] = None,
+                  ax: Optional[Axes] = None,
                   tau_minutes: float = SMOOTH_TAU_MIN,
                   colors_map: Optional[Dict[str, str]] = None,
-                  legend_mode: str = "full") -> plt.Axes:
+                  legend_mode: str = "full") -> Axes:
     colors = colors_map or {}
     if ax is None:
-        fig, ax = plt.subplots()
+        fig, ax = session_fig("smoothed")
 
     col_home = colors.get(teams[0], "#777777")
     col_away = colors.get(teams[1], "#999999")
 
-    # Convert minute and team columns to numeric arrays for computation.
-    x = minute_df["minute"].values.astype(float)
-    a = minute_df["team_a"].values.astype(float)
-    b = -minute_df["team_b"].values.astype(float)
+    # Write the team columns straight into the (3, N) float64 buffer `ewma`
+    # filters, so it needs no further conversion: home, negated away, net.
+    x = minute_df["minute"].to_numpy(dtype=float)
+    series = np.empty((3, len(minute_df)))
+    series[0] = minute_df["team_a"].to_numpy()
+    np.negative(minute_df["team_b"].to_numpy(), out=series[1])
+    np.add(series[0], series[1], out=series[2])
 
-    # Smooth each team's per-minute series with EWMA. Using dt_minutes=1
-    # assumes that the input frame is strictly per-minute.
-    a_s = ewma(a, dt_minutes=1.0, tau_minutes=tau_minutes)
-    b_s = ewma(b, dt_minutes=1.0, tau_minutes=tau_minutes)
-    net = ewma(a - (-b), dt_minutes=1.0, tau_minutes=tau_minutes)
+    # Smooth both teams' per-minute series and the net difference with one
+    # EWMA call over the stacked rows. Using dt_minutes=1 assumes that the
+    # input frame is strictly per-minute.
+    a_s, b_s, net = ewma(series, dt_minutes=1.0, tau_minutes=tau_minutes)
 
     # Plot smoothed lines and the net difference (dashed).
     la = ax.plot(x, a_s, color=col_home, linewidth=2, label=teams[0])[0]
@@ -276,32 +416,33 @@ def plot_smoothed(minute_df: pd.DataFrame,
 # --- Top players (horizontal bars) ----------------
 def plot_top_players(df_goles: pd.DataFrame,
                      top_n: int = TOP_N_PLAYERS,
-                     ax: Optional[plt.Axes] = None,
+                     ax: Optional[Axes] = None,
                      colors_map: Optional[Dict[str, str]] = None,
                      show_legend: bool = True,
-                     legend_loc: str = "best") -> plt.Axes:
+                     legend_loc: str = "best") -> Axes:
     if ax is None:
-        fig, ax = plt.subplots()
+        fig, ax = session_fig("top_players")
     colors = colors_map or {}
 
-    desc = df_goles["Description"].astype(str).str.strip().str.lower()
-    df   = df_goles.copy()
-    df["score"] = np.where(desc.isin({"goal", "goal!"}), GOAL_WEIGHT, ATTEMPT_WEIGHT)
+    # Normalize only the distinct descriptions (a handful) instead of every
+    # row, then build the score as a raw ndarray with a single isin.
+    desc = df_goles["Description"]
+    goal_vals = [v for v in pd.unique(desc) if str(v).strip().lower() in {"goal", "goal!"}]
+    score = np.where(desc.isin(goal_vals).to_numpy(), GOAL_WEIGHT, ATTEMPT_WEIGHT)
 
     agg = (
-        df.groupby(["PlayerName", "TeamName"], as_index=False)["score"]
+        df_goles.assign(score=score)
+          .groupby(["PlayerName", "TeamName"], as_index=False, observed=True)["score"]
           .sum()
           .sort_values("score", ascending=False)
           .head(top_n)
     )
 
-    # Colors per team with outlines for light colors
-    bar_colors = agg["TeamName"].map(lambda t: colors.get(t, "#888888"))
+    # Colors per team with outlines for light colors (one lookup per bar)
+    bar_colors = [colors.get(t, "#888888") for t in agg["TeamName"]]
     bars = ax.barh(agg["PlayerName"], agg["score"], color=bar_colors)
-    for patch, team in zip(bars, agg["TeamName"]):
-        c = colors.get(team, "#888888")
-        if _is_light_color(c):
-            patch.set_edgecolor("black"); patch.set_linewidth(1.0)
+    for i in np.flatnonzero(_are_light_colors(bar_colors)):
+        bars[i].set_edgecolor("black"); bars[i].set_linewidth(1.0)
 
     ax.invert_yaxis()
     ax.set_xlabel("Attacking participation (attempts + 2×goals)", fontsize=6)
@@ -316,20 +457,37 @@ def plot_top_players(df_goles: pd.DataFrame,
 
 # --- Cumulative attack rate ----------------
 def plot_cumulative(df_goles: pd.DataFrame,
-                    ax: Optional[plt.Axes] = None,
+                    ax: Optional[Axes] = None,
                     colors_map: Optional[Dict[str, str]] = None,
-                    show_legend: bool = True) -> plt.Axes:
-    if ax is None: fig, ax = plt.subplots()
+                    show_legend: bool = True) -> Axes:
+    if ax is None: fig, ax = session_fig("cumulative")
     colors = colors_map or {}
     teams = teams_ordered(df_goles["TeamName"])
 
+    # One staircase polyline per team ("post" steps: hold each value until the
+    # next event), drawn as a single LineCollection instead of one Line2D each.
+    paths, path_colors, outlines = [], [], []
     for team in teams:
         tmp = df_goles[df_goles["TeamName"] == team].sort_values("sec")
-        x = tmp["sec"].values / 60.0
-        y = tmp["w"].cumsum().values
+        x = tmp["sec"].to_numpy(dtype=float) / 60.0
+        y = tmp["w"].to_numpy(dtype=float).cumsum()
+        if x.size == 0:
+            continue
+        xs = np.repeat(x, 2)[1:]
+        ys = np.repeat(y, 2)[:-1]
+        paths.append(np.column_stack([xs, ys]))
         col = colors.get(team, "#888888")
-        line = ax.step(x, y, where="post", label=team, color=col)[0]
-        _outline_line_if_light(line, col)
+        path_colors.append(col)
+        if _is_light_color(col):
+            outlines.append(paths[-1])
+
+    lw = mpl.rcParams["lines.linewidth"]
+    if outlines:
+        # Black strokes behind very light lines so they remain visible.
+        ax.add_collection(LineCollection(outlines, colors="black", linewidths=lw + 1.5))
+    if paths:
+        ax.add_collection(LineCollection(paths, colors=path_colors, linewidths=lw))
+        ax.autoscale_view()
 
     ax.set_xlabel("Minute", fontsize=6); ax.set_ylabel("Cumulative participation", fontsize=6)
     ax.tick_params(axis="both", labelsize=6)
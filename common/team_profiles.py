@@ -25,7 +25,7 @@ from sklearn.preprocessing import StandardScaler
 
 from common.constants import COMPETITIONID, SEASONID, STAGEID
 from common.ml_labels import CLUSTER_ORDER
-from common.utils import get_match_events, get_matches
+from common.utils import get_match_events, get_matches, match_finished
 
 # Features used in clustering
 PROFILE_FEATURES: List[str] = [
@@ -108,6 +108,7 @@ def load_all_attacking_events() -> pd.DataFrame:
                 SEASONID,
                 STAGEID,
                 match_id,
+                match_finished(row.get("KickoffTS")),
             ).copy()
         except Exception:
             # If one match fails, we skip it and continue
@@ -370,7 +371,6 @@ def get_team_profile_map() -> Dict[str, str]:
     return dict(zip(df_profiles["TeamName"], df_profiles["ClusterLabel"]))
 
 
-import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 from common.ml_labels import CLUSTER_COLORS, CLUSTER_ORDER
@@ -401,6 +401,9 @@ def plot_team_profiles_pca(
     ax : matplotlib axis
     """
     if ax is None:
+        # pyplot is only needed for this standalone figure; importing it here
+        # keeps it (and its backend setup) off pages that never call this.
+        import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(8, 6))
 
     selected_teams = selected_teams or []
@@ -2,7 +2,7 @@
 Common utility functions for data fetching and lightweight helpers used by
 multiple pages.
 
-This module contains network helpers (a small requests.Session wrapper),
+This module contains network helpers (a small cached requests session wrapper),
 Streamlit-friendly cached wrappers around API calls (e.g., `get_matches`),
 and UI convenience utilities such as `selectbox_with_placeholder` used to
 render a selectbox that can start with a placeholder text.
@@ -14,13 +14,21 @@ rest of the app uses pandas for tabular manipulations and plotting.
 # Import libraries
 from __future__ import annotations
 import os, re
-from typing import Any, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import orjson
 import pandas as pd
-import requests
+import requests_cache
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from .constants import BASE_URL, LANG, USER_AGENT
 
+@lru_cache(maxsize=1)
 def get_users() -> Dict[str, str]:
+    # Read once per process (secrets are static); treat the dict as read-only.
     try:
         if "auth" in st.secrets and "users" in st.secrets["auth"]:
             return dict(st.secrets["auth"]["users"])
@@ -33,21 +41,77 @@ def safe_rerun() -> None:
     elif hasattr(st, "experimental_rerun"): st.experimental_rerun()
     else: st.stop()
 
-SESSION = requests.Session()
+# HTTP-level cache shared by every `fifa_get` call. Responses survive process
+# restarts (SQLite file next to the app); once `expire_after` passes, the
+# request is revalidated with If-None-Match / If-Modified-Since so unchanged
+# payloads come back as a small 304. Stale data is served if FIFA is down.
+# Timelines and squads of finished matches do not change, so callers pass
+# `finished=True` for those and they are kept for 30 days, answered from disk
+# without contacting FIFA at all; upcoming/live matches keep the default TTL.
+# Set FFWC_DISK_CACHE=0 (e.g. in development) to use a per-process memory cache.
+_DISK_CACHE = os.getenv("FFWC_DISK_CACHE", "1") == "1"
+_IMMUTABLE_TTL = 30 * 86400
+# A match counts as finished this long after kickoff. Kickoff times are
+# venue-local, so the margin also absorbs the time-zone offset.
+_FINISHED_AFTER = pd.Timedelta(days=1)
+SESSION = requests_cache.CachedSession(
+    cache_name=".fifa_http",
+    backend="sqlite" if _DISK_CACHE else "memory",
+    expire_after=3600,
+    stale_if_error=True,
+)
 SESSION.headers.update({"User-Agent": USER_AGENT})
 
-def fifa_get(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+# Keep enough warm connections for the concurrent squad fetches and retry
+# transient FIFA API failures (rate limits / 5xx) with a short backoff.
+_ADAPTER = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    ),
+)
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+
+def match_finished(kickoff_ts: Any) -> bool:
+    # True once the kickoff is comfortably in the past; unknown kickoffs are
+    # treated as not finished so they never get the long cache lifetime.
+    if kickoff_ts is None or pd.isna(kickoff_ts):
+        return False
+    ts = pd.Timestamp(kickoff_ts)
+    return ts + _FINISHED_AFTER < pd.Timestamp.now(tz=ts.tz)
+
+def fifa_get(path: str, params: Optional[Dict[str, Any]] = None, finished: bool = False) -> Any:
+    # `finished=True` marks immutable data (a played match): it is kept on disk
+    # for `_IMMUTABLE_TTL` instead of the session default.
     url = f"{BASE_URL.rstrip('/')}/{path.lstrip('/')}"
     qp = {"language": LANG}
     if params: qp.update(params)
-    resp = SESSION.get(url, params=qp, timeout=(10,20))
+    expire_after = _IMMUTABLE_TTL if finished and _DISK_CACHE else None
+    resp = SESSION.get(url, params=qp, timeout=(10,20), expire_after=expire_after)
     resp.raise_for_status()
-    return resp.json()
+    # orjson parses the (often large) timeline payloads several times faster
+    # than the stdlib json module behind `resp.json()`.
+    return orjson.loads(resp.content)
 
 def i18n_desc(lst: Any, default: str = "") -> str:
-    if isinstance(lst, list) and lst:
+    # Localized fields are almost always a non-empty list of dicts, so try the
+    # lookup directly and fall back on the rare empty/missing value.
+    try:
         return str(lst[0].get("Description", default) or default)
-    return default
+    except (TypeError, IndexError, KeyError, AttributeError):
+        return default
+
+def i18n_col(col: List[Any], default: str = "") -> List[str]:
+    # Column-wise `i18n_desc`: one tight comprehension instead of a Python
+    # call per value.
+    return [str(x[0].get("Description", default) or default)
+            if isinstance(x, list) and x and isinstance(x[0], dict) else default
+            for x in col]
 
 @st.cache_data(ttl=3600, show_spinner=False)
 def get_matches(season_id: str, count: int = 500) -> pd.DataFrame:
@@ -57,70 +121,105 @@ def get_matches(season_id: str, count: int = 500) -> pd.DataFrame:
     data = fifa_get("/calendar/matches", params={"idSeason": season_id, "count": count})
     results = data.get("Results", []) or []
 
-    rows = []
-    for m in results:
-        # Defensive extraction: JSON may not include 'Home' or 'Away' keys.
-        home, away = (m.get("Home", {}) or {}), (m.get("Away", {}) or {})
-
-        # Parse kickoff timestamp robustly; invalid/empty strings become NaT.
-        local_date_str = m.get("LocalDate", "")
-        ts = pd.to_datetime(local_date_str, errors="coerce")
-
-        # Build a flat row with normalized field names used by the app.
-        row = {
-            "MatchId": m.get("IdMatch", ""),
-            "StageName": i18n_desc(m.get("StageName")),
-            "GroupName": i18n_desc(m.get("GroupName")),
-            "HomeId": home.get("IdTeam", ""),
-            "HomeName": home.get("ShortClubName", "") or home.get("TeamName", ""),
-            "AwayId": away.get("IdTeam", ""),
-            "AwayName": away.get("ShortClubName", "") or away.get("TeamName", ""),
-            "KickoffTS": ts if pd.notnull(ts) else pd.NaT,
-            "KickoffDate": ts.strftime("%Y-%m-%d") if pd.notnull(ts) else "",
-        }
-        # Friendly label used in selectboxes.
-        row["MatchName"] = f'{row["HomeName"]} vs {row["AwayName"]}'
-        rows.append(row)
+    # Defensive extraction: JSON may not include 'Home' or 'Away' keys.
+    homes = [m.get("Home", {}) or {} for m in results]
+    aways = [m.get("Away", {}) or {} for m in results]
+
+    # Build the frame column by column with normalized field names used by
+    # the app; derived columns are then computed on whole columns at once.
+    df = pd.DataFrame({
+        "MatchId": [m.get("IdMatch", "") for m in results],
+        "StageName": i18n_col([m.get("StageName") for m in results]),
+        "GroupName": i18n_col([m.get("GroupName") for m in results]),
+        "HomeId": [h.get("IdTeam", "") for h in homes],
+        "HomeName": [h.get("ShortClubName", "") or h.get("TeamName", "") for h in homes],
+        "AwayId": [a.get("IdTeam", "") for a in aways],
+        "AwayName": [a.get("ShortClubName", "") or a.get("TeamName", "") for a in aways],
+    })
 
-    df = pd.DataFrame(rows)
-    # Ensure KickoffTS is a proper datetime dtype after DataFrame construction.
-    df["KickoffTS"] = pd.to_datetime(df["KickoffTS"], errors="coerce")
+    # Parse kickoff timestamps robustly; invalid/empty strings become NaT.
+    # FIFA sends ISO 8601, so the explicit format keeps pandas on its fast
+    # parser and still accepts each value on its own (no format inference
+    # from the first row).
+    df["KickoffTS"] = pd.to_datetime([m.get("LocalDate", "") for m in results],
+                                     errors="coerce", format="ISO8601")
+    df["KickoffDate"] = df["KickoffTS"].dt.strftime("%Y-%m-%d").fillna("")
+    # Friendly label used in selectboxes.
+    df["MatchName"] = df["HomeName"].astype(str) + " vs " + df["AwayName"].astype(str)
     return df
 
 @st.cache_data(ttl=1800, show_spinner=False)
-def get_match_events(competition_id: str, season_id: str, stage_id: str, match_id: str) -> pd.DataFrame:
+def get_match_events(competition_id: str, season_id: str, stage_id: str, match_id: str,
+                     finished: bool = False) -> pd.DataFrame:
     # Fetch the match timeline JSON and convert into a DataFrame of interest.
-    data = fifa_get(f"/timelines/{competition_id}/{season_id}/{stage_id}/{match_id}")
+    data = fifa_get(f"/timelines/{competition_id}/{season_id}/{stage_id}/{match_id}", finished=finished)
     events = data.get("Event", []) or []
 
     # Build a lightweight events DataFrame containing only the fields the app
     # needs. Use defensive .get() with defaults to avoid KeyError on missing data.
+    # All four columns are filled in a single walk over the events list.
+    n = len(events)
+    team_ids, player_ids, descs, minutes = [""] * n, [""] * n, [""] * n, [""] * n
+    for i, e in enumerate(events):
+        team_ids[i] = e.get("IdTeam", "")
+        player_ids[i] = e.get("IdPlayer", "")
+        # Inlined `i18n_desc`: this is the hottest call site.
+        tl = e.get("TypeLocalized")
+        descs[i] = str(tl[0].get("Description", "") or "") if isinstance(tl, list) and tl else ""
+        minutes[i] = e.get("MatchMinute", "")
     return pd.DataFrame({
-        "TeamId": [e.get("IdTeam", "") for e in events],
-        "PlayerId": [e.get("IdPlayer", "") for e in events],
-        "Description": [i18n_desc(e.get("TypeLocalized")) for e in events],
-        "MatchMinute": [e.get("MatchMinute", "") for e in events],
-    })
+        "TeamId": team_ids,
+        "PlayerId": player_ids,
+        "Description": descs,
+        "MatchMinute": minutes,
+    }, copy=False)
 
 @st.cache_data(ttl=86400, show_spinner=False)
-def get_players_for_teams(team_ids: Iterable[str], competition_id: str, season_id: str) -> pd.DataFrame:
+def get_players_for_teams(team_ids: Iterable[str], competition_id: str, season_id: str,
+                          finished: bool = False) -> pd.DataFrame:
     # For each requested team, call the squad endpoint and extract a small
     # players table. Cache the result because squad rosters rarely change.
-    rows = []
-    for tid in team_ids:
-        data = fifa_get(f"/teams/{tid}/squad", params={"idCompetition": competition_id, "idSeason": season_id})
-        for p in data.get("Players", []) or []:
-            rows.append({
-                "TeamId": p.get("IdTeam", ""),
-                "PlayerId": p.get("IdPlayer", ""),
-                # Use i18n_desc to safely extract possibly-localized short name
-                "PlayerName": i18n_desc(p.get("ShortName")),
-            })
-    return pd.DataFrame(rows)
+    # The requests are network-bound, so they are issued concurrently.
+    def _fetch(tid: str) -> Any:
+        return fifa_get(f"/teams/{tid}/squad", params={"idCompetition": competition_id, "idSeason": season_id},
+                        finished=finished)
+
+    # One worker per team (at most 8); all of them share SESSION's
+    # keep-alive connection pool.
+    team_ids = list(team_ids)
+    if not team_ids:
+        return pd.DataFrame.from_records([])
+    with ThreadPoolExecutor(max_workers=min(8, len(team_ids))) as ex:
+        squads = list(ex.map(_fetch, team_ids))
+
+    rows = [
+        {
+            "TeamId": p.get("IdTeam", ""),
+            "PlayerId": p.get("IdPlayer", ""),
+            # Use i18n_desc to safely extract possibly-localized short name
+            "PlayerName": i18n_desc(p.get("ShortName")),
+        }
+        for data in squads
+        for p in data.get("Players", []) or []
+    ]
+    return pd.DataFrame.from_records(rows)
+
+_GROUP_RE = re.compile(r"Group\s+([A-Z])", flags=re.I)
+_GROUP_LETTER_RANK = {chr(c): c - ord("A") + 1 for c in range(ord("A"), ord("Z") + 1)}
+# Checked in order: the first matching pattern decides the stage rank. The
+# patterns are case-insensitive, so stage names need no lowercasing pass.
+_STAGE_RANKS = [
+    (re.compile(p, flags=re.I), v)
+    for p, v in [(r"round\s*of\s*16|sixteen", 200), (r"quarter-?final", 300),
+                 (r"semi-?final", 400), (r"third|3rd", 500), (r"final", 600)]
+]
+
+_TIMELINE_EVENTS = ["Attempt at Goal", "Goal!"]
+_MINUTE_RE = re.compile(r"(\d+)")
 
 def group_rank(name: str) -> int:
     if not name: return 99
-    m = re.search(r"Group\s+([A-Z])", str(name), flags=re.I)
+    m = _GROUP_RE.search(str(name))
     if m:
         ch = m.group(1).upper()
         if "A" <= ch <= "Z":
@@ -128,23 +227,32 @@ def group_rank(name: str) -> int:
     return 99
 
 def stage_order(stage: str) -> int:
-    s = (stage or "").lower()
-    for pattern, val in [(r"round\s*of\s*16|sixteen",200),(r"quarter-?final",300),(r"semi-?final",400),(r"third|3rd",500),(r"final",600)]:
-        if re.search(pattern, s): return val
+    s = stage or ""
+    for pattern, val in _STAGE_RANKS:
+        if pattern.search(s): return val
     return 700
 
 def sort_matches_for_select(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["__is_group"] = df["GroupName"].fillna("").str.contains(r"Group\s+[A-Z]", case=False, regex=True)
-    df["__g_rank"], df["__s_rank"] = df["GroupName"].map(group_rank), df["StageName"].map(stage_order)
-    df["__has_date"] = df["KickoffTS"].notna()
-    df = df.sort_values(by=["__is_group","__g_rank","__s_rank","__has_date","KickoffTS","MatchName"],
-                        ascending=[False,True,True,False,True,True], kind="mergesort")
-    return df.drop(columns=["__is_group","__g_rank","__s_rank","__has_date"])
+    # Column-wise equivalents of `group_rank` / `stage_order`, so the sort
+    # keys are computed by pandas string kernels instead of per-row calls.
+    letters = df["GroupName"].fillna("").astype(str).str.extract(_GROUP_RE, expand=False)
+    g_rank = letters.str.upper().map(_GROUP_LETTER_RANK).fillna(99).to_numpy(dtype=np.int16)
+    is_group = letters.notna().to_numpy()
+    stage = df["StageName"].fillna("").astype(str)
+    s_rank = np.select([stage.str.contains(p).to_numpy(dtype=bool) for p, _ in _STAGE_RANKS],
+                       [v for _, v in _STAGE_RANKS], default=700)
+    has_date = df["KickoffTS"].notna().to_numpy()
+    # Sorted factorize codes keep the ordering of the timestamp and name
+    # columns while letting lexsort work on plain integer arrays.
+    ts_codes = pd.factorize(df["KickoffTS"], sort=True)[0]
+    name_codes = pd.factorize(df["MatchName"], sort=True)[0]
+    # np.lexsort is stable and uses the last key as the primary one.
+    order = np.lexsort((name_codes, ts_codes, ~has_date, s_rank, g_rank, ~is_group))
+    return df.iloc[order]
 
 def selectbox_with_placeholder(
     label: str,
-    options: List[str],
+    options: Sequence[str],
     key: Optional[str] = None,
     default_index: Optional[int] = None,
 ):
@@ -169,7 +277,7 @@ def selectbox_with_placeholder(
         # inserting a synthetic placeholder item at the front of the list.
         if default_index is None:
             placeholder = f"— {label} —"
-            choice = st.selectbox(" ", options=[placeholder] + options, index=0, key=key)
+            choice = st.selectbox(" ", options=[placeholder, *options], index=0, key=key)
             # Return None when the placeholder is selected so callers can
             # detect 'no selection' consistently.
             return None if choice == placeholder else choice
@@ -178,40 +286,59 @@ def selectbox_with_placeholder(
             # using the older Streamlit API.
             return st.selectbox(" ", options=options, index=default_index, key=key)
 
+def team_codes(team_ids: pd.Series, match_row: pd.Series) -> np.ndarray:
+    # Position of each TeamId in (HomeId, AwayId), -1 for any other team.
+    # Indexing a small [home, away, fallback] array with these codes replaces
+    # a per-row dict lookup through `Series.map`.
+    ids = list(dict.fromkeys([str(match_row["HomeId"]), str(match_row["AwayId"])]))
+    return pd.Categorical(team_ids.astype(str), categories=ids).codes
+
 def process_timeline(df_events: pd.DataFrame, df_squads: pd.DataFrame, match_row: pd.Series) -> pd.DataFrame:
     """Return a cleaned timeline focused on attacking actions.
 
     Steps performed:
-      1. Normalize `TeamId` to string and map it to the friendly team name using
+      1. Filter to only focus on attacking actions (Attempt at Goal, Goal!).
+      2. Normalize `TeamId` to string and map it to the friendly team name using
          values from `match_row`.
-      2. Merge player names from `df_squads` when available so the timeline
+      3. Merge player names from `df_squads` when available so the timeline
          includes `PlayerName` values for display.
-      3. Filter to only focus on attacking actions (Attempt at Goal, Goal!).
-      4. Select and order the final columns and sort by the raw `MatchMinute`
-         string so the UI shows events in chronological order.
+      4. Select and order the final columns and sort by the integer minute
+         parsed from `MatchMinute` so the UI shows events in chronological
+         order ("9'" before "10'").
     """
-    team_names = {
-        str(match_row["HomeId"]): str(match_row["HomeName"]),
-        str(match_row["AwayId"]): str(match_row["AwayName"]),
-    }
+    # Home name, away name, then "" for events of any other team (code -1).
+    team_names = np.asarray([str(match_row["HomeName"]), str(match_row["AwayName"]), ""], dtype=object)
 
-    # Work on a copy to avoid mutating the original events DataFrame.
-    df = df_events.copy()
-    df["TeamId"] = df["TeamId"].astype(str)
+    # Description becomes a Categorical over the attacking actions, so anything
+    # else turns into NaN and the filter is a check on the integer codes
+    # rather than a string comparison.
+    desc = pd.Categorical(df_events["Description"], categories=_TIMELINE_EVENTS)
+    mask = desc.codes >= 0
 
-    # Map TeamId to human readable TeamName using the selected match metadata.
-    df["TeamName"] = df["TeamId"].map(team_names)
+    # Filter to attacking actions first; this reduces noise for the timeline
+    # UI and means only those rows (of the needed columns) are ever copied.
+    # The original events DataFrame is not mutated. TeamId is normalized to
+    # str and mapped to the human readable TeamName of the selected match.
+    df = df_events.loc[mask, ["TeamId", "PlayerId", "MatchMinute"]].assign(
+        Description=desc[mask],
+        TeamId=lambda d: d["TeamId"].astype(str),
+        TeamName=lambda d: team_names[team_codes(d["TeamId"], match_row)],
+    )
 
     # Merge player names when squads data is present so the timeline shows
     # who performed each action.
     if not df_squads.empty:
         df = df.merge(df_squads[["PlayerId", "PlayerName"]], on="PlayerId", how="left")
 
-    # Filter to attacking actions only; this reduces noise for the timeline UI.
-    df = df[df["Description"].isin(["Attempt at Goal", "Goal!"])]
-
     # Keep only the columns the UI needs and replace NaNs with empty strings
     # to avoid rendering issues in Streamlit's dataframe components.
-    df = df[["TeamId", "TeamName", "Description", "MatchMinute", "PlayerName"]].fillna("")
-    return df.sort_values(by=["MatchMinute"]).reset_index(drop=True)
+    df = df[["TeamId", "TeamName", "Description", "MatchMinute", "PlayerName"]].fillna(
+        {"TeamName": "", "MatchMinute": "", "PlayerName": ""}
+    )
+
+    # Order by the leading integer of MatchMinute (e.g. "40'+2'" -> 40); rows
+    # without a parsable minute go last and ties keep their event order.
+    minute = pd.to_numeric(df["MatchMinute"].astype(str).str.extract(_MINUTE_RE, expand=False))
+    order = np.argsort(minute.fillna(32767).to_numpy(), kind="stable")
+    return df.iloc[order].reset_index(drop=True)
 
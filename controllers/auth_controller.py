@@ -19,8 +19,11 @@ Implementation notes:
 
 # Import libraries
 from __future__ import annotations
+import hmac
 import os
 from datetime import timedelta
+from functools import lru_cache
+from pathlib import Path
 import streamlit as st
 import extra_streamlit_components as stx
 
@@ -30,6 +33,9 @@ COOKIE_DAYS  = int(os.getenv("FFWC_COOKIE_DAYS", "7"))
 APP_USER     = os.getenv("APP_USER", "admin")
 APP_PASSWORD = os.getenv("APP_PASSWORD", "admin")
 
+# Login page stylesheet (static file, read once per process)
+LOGIN_CSS_PATH = Path(__file__).resolve().parents[1] / "styles" / "login.css"
+
 # Unique keys for cookie components (must not collide in one run)
 CM_KEY_MAIN    = "ffwc_cookie_component_main"
 CM_KEY_SIDEBAR = "ffwc_cookie_component_sidebar"
@@ -39,7 +45,10 @@ def _safe_rerun() -> None:
     elif hasattr(st, "experimental_rerun"): st.experimental_rerun()
     else: st.stop()
 
+@lru_cache(maxsize=1)
 def _get_users() -> dict[str, str]:
+    # Secrets do not change within a process, so read them once. Callers
+    # must treat the returned dict as read-only.
     try:
         if "auth" in st.secrets and "users" in st.secrets["auth"]:
             return dict(st.secrets["auth"]["users"])
@@ -47,17 +56,24 @@ def _get_users() -> dict[str, str]:
         pass
     return {APP_USER: APP_PASSWORD}
 
+@lru_cache(maxsize=1)
+def _login_css() -> str:
+    try:
+        return f"<style>{LOGIN_CSS_PATH.read_text(encoding='utf-8')}</style>"
+    except OSError:
+        return ""
+
 def login_page():
     """
     Returns (username, None) when authenticated.
     Handles cookie auto-login unless a force-logout flag is present.
     """
-    users = _get_users()
-
     # Already authenticated this run?
     if st.session_state.get("authenticated") and st.session_state.get("username"):
         return st.session_state["username"], None
 
+    users = _get_users()
+
     # Instantiate a CookieManager component that we will use both to read
     # and to set the authentication cookie. The key ensures the component
     # instance is unique within a Streamlit run.
@@ -91,13 +107,10 @@ def login_page():
         except Exception:
             pass
 
-    # Render login UI (hide sidebar only here)
-    st.markdown("""
-        <style>
-          [data-testid="stSidebar"] { display: none; }
-          .block-container { padding-top: 10vh; max-width: 560px; }
-        </style>
-    """, unsafe_allow_html=True)
+    # Render login UI (hide sidebar only here). Streamlit drops elements that
+    # a rerun does not emit again, so the style tag is sent on every run; only
+    # the file read is done once.
+    st.markdown(_login_css(), unsafe_allow_html=True)
 
     st.markdown("## FiFa Futsal 2024 Attacking Performance app login")
     with st.form("login_form", clear_on_submit=False):
@@ -107,7 +120,9 @@ def login_page():
         ok = st.form_submit_button("Login")
 
     if ok:
-        if user in users and pwd == users[user]:
+        # Constant-time comparison (on UTF-8 bytes, as compare_digest only
+        # accepts ASCII str) so response time does not leak the password.
+        if user in users and hmac.compare_digest(pwd.encode("utf-8"), str(users[user]).encode("utf-8")):
             st.session_state["authenticated"] = True
             st.session_state["username"] = user
             st.session_state["remember"] = remember
@@ -2,41 +2,97 @@
 Data controller helpers that glue the common data-fetching utilities to
 the Streamlit pages.
 
-This module exposes two convenience functions used by pages:
+This module exposes four convenience functions used by pages:
     - `load_matches()` returns a DataFrame with the available matches.
-    - `load_match_datasets(match_row)` returns raw events, squad/player info
-        and a processed timeline DataFrame that the UI can show directly.
+    - `load_sorted_matches()` returns the same matches in selectbox order,
+        sorted once per cache period.
+    - `load_match_datasets(match_row)` returns raw events, squad/player info,
+        a processed timeline DataFrame that the UI can show directly and the
+        final (home_goals, away_goals) score.
+    - `load_match_datasets_by_id(match_id)` is the cached variant of the
+        above, keyed on the match id so reruns and page switches reuse it.
 
 All heavy lifting (HTTP requests, caching, JSON -> DataFrame transformations)
 is implemented in `common.utils`. This module simply composes those helpers
 and adds the extra step of enriching the timeline with team flag URLs.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-from common.utils import get_matches, get_match_events, get_players_for_teams, process_timeline
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from common.utils import (
+    get_matches, get_match_events, get_players_for_teams, match_finished, process_timeline, sort_matches_for_select, team_codes,
+)
 from common.constants import COMPETITIONID, SEASONID, STAGEID
-from common.flags import get_team_flags, flags_by_teamid   # helper to map TeamId -> flag URL
+from common.flags import get_flags_map   # cached TeamId -> flag URL map
 
 def load_matches() -> pd.DataFrame:
     return get_matches(SEASONID)
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_sorted_matches() -> pd.DataFrame:
+    # The select order only depends on the (cached) match list, so the sort
+    # keys are built once per TTL instead of on every rerun. No arguments:
+    # nothing has to be hashed on a cache hit.
+    return sort_matches_for_select(load_matches())
+
 def load_match_datasets(match_row: pd.Series):
     # 1) Load raw datasets from the API (cached via helpers in `common.utils`).
-    events = get_match_events(COMPETITIONID, SEASONID, STAGEID, str(match_row["MatchId"]))
-    squads = get_players_for_teams([str(match_row["HomeId"]), str(match_row["AwayId"])], COMPETITIONID, SEASONID)
+    #    The three requests are independent, so they run concurrently and the
+    #    page waits for the slowest one instead of their sum. Workers get the
+    #    current script run context so the `st.cache_data` wrappers behave as
+    #    they do on the main script thread.
+    #    Data of a finished match is immutable and gets the long HTTP cache TTL.
+    finished = match_finished(match_row.get("KickoffTS"))
+    ctx = get_script_run_ctx(suppress_warning=True)
+    with ThreadPoolExecutor(max_workers=3, initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        f_events = ex.submit(get_match_events, COMPETITIONID, SEASONID, STAGEID, str(match_row["MatchId"]),
+                             finished)
+        f_squads = ex.submit(get_players_for_teams, [str(match_row["HomeId"]), str(match_row["AwayId"])],
+                             COMPETITIONID, SEASONID, finished)
+        f_flags = ex.submit(get_flags_map)
+        events, squads, flag_map = f_events.result(), f_squads.result(), f_flags.result()
+
+    # These columns hold a handful of distinct strings repeated across every
+    # event; as categoricals, equality filters such as `== "Goal!"`, the
+    # per-team/per-event groupbys and the squad merges work on integer codes.
+    # Ids stay string-valued: squads, flags and match rows key on str ids.
+    events = events.astype({"Description": "category", "TeamId": "category", "PlayerId": "category"})
 
     # 2) Process timeline: normalize team/player names and keep attacking actions.
     timeline = process_timeline(events, squads, match_row)
 
-    # 3) Enrich timeline with flag URLs. `get_team_flags` is cached, so this is
-    #    a cheap lookup most of the time. `flags_by_teamid` turns the DataFrame
-    #    into a simple mapping TeamId -> FlagURL which we then map into the
-    #    timeline and insert as the first column for nicer table rendering.
-    df_flags = get_team_flags()                # cached
-    flag_map = flags_by_teamid(df_flags)
-    timeline.insert(0, "Flag", timeline["TeamId"].map(flag_map))  # first column
+    # 3) Enrich timeline with flag URLs. `get_flags_map` is a cached
+    #    TeamId -> FlagURL mapping (built once per process). Only the two
+    #    teams of the match are looked up; each row then indexes
+    #    [home_flag, away_flag, None] by its team code. Flag is placed first
+    #    for nicer table rendering by selecting the final column order rather
+    #    than shifting every column with `insert`.
+    flags = np.asarray([flag_map.get(str(match_row["HomeId"])),
+                        flag_map.get(str(match_row["AwayId"])), None], dtype=object)
+    timeline = timeline.assign(Flag=flags[team_codes(timeline["TeamId"], match_row)])[
+        ["Flag", "TeamId", "TeamName", "Description", "MatchMinute", "PlayerName"]
+    ]
+
+    # 4) Final score: goal events per team, counted once here so pages do not
+    #    re-filter the events for their score line.
+    goal_codes = team_codes(events.loc[events["Description"] == "Goal!", "TeamId"], match_row)
+    score = (int((goal_codes == 0).sum()), int((goal_codes == 1).sum()))
 
     # Return the raw events and squads along with the prepared timeline used
-    # directly by the UI.
-    return events, squads, timeline
+    # directly by the UI and the score.
+    return events, squads, timeline, score
 
+@st.cache_data(ttl=1800, show_spinner=False)
+def load_match_datasets_by_id(match_id: str):
+    # Cached `load_match_datasets`, keyed on the scalar match id (cheap to
+    # hash, unlike a Series). On a hit the timeline is not re-processed and
+    # flags are not re-mapped; the underlying API calls are cached as well.
+    df_matches = load_matches()
+    match_row = df_matches.loc[df_matches["MatchId"].astype(str) == str(match_id)]
+    if match_row.empty:
+        raise KeyError(f"Unknown match id: {match_id}")
+    return load_match_datasets(match_row.iloc[0])
@@ -8,11 +8,19 @@ This module receives raw events for a match and computes two derived tables:
 Functions here are intentionally small and pure so they are easy to test.
 The page that calls `compute_event_stats` is responsible for display and
 layout; this module focuses on data transformations only.
+
+`compute_event_stats_by_id` and `build_attack_tables_by_id` are cached
+(`st.cache_data`) per match id, so page reruns reuse the derived tables.
 """
 # Import libraries
+import numpy as np
 import pandas as pd
+import streamlit as st
 from common.constants import WHITELIST_EVENTS
-from common.flags import get_team_flags, flags_by_teamid   # map TeamId -> flag URL
+from common.metrics import build_attack_df, build_minute_matrix, build_goals_only
+from controllers.data_controller import load_match_datasets_by_id
+from common.utils import team_codes
+from common.flags import get_flags_map   # cached TeamId -> flag URL map
 
 def compute_event_stats(df_events: pd.DataFrame, match_row: pd.Series) -> tuple[pd.DataFrame, pd.DataFrame]:
     team_names = {
@@ -21,49 +29,68 @@ def compute_event_stats(df_events: pd.DataFrame, match_row: pd.Series) -> tuple[
     }
 
     # Flag mapping (by TeamId)
-    df_flags = get_team_flags()
-    flag_map = flags_by_teamid(df_flags)
+    flag_map = get_flags_map()
     name_to_flag = {
         team_names[str(match_row["HomeId"])]: flag_map.get(str(match_row["HomeId"]), ""),
         team_names[str(match_row["AwayId"])]: flag_map.get(str(match_row["AwayId"]), ""),
     }
 
+    teams_order = [team_names[str(match_row["HomeId"])], team_names[str(match_row["AwayId"])]]
+
+    # Two teams and a small event vocabulary: categoricals let the groupby and
+    # isin below hash/compare integer codes instead of Python strings.
     df_all = df_events.copy()
     df_all["TeamId"] = df_all["TeamId"].astype(str)
-    df_all["TeamName"] = df_all["TeamId"].map(team_names)
-    df_all["Description"] = df_all["Description"].astype(str)
+    # TeamName codes come straight from the Home/Away team codes (-1 for any
+    # other team), so no per-row dict lookup is needed.
+    name_categories = list(dict.fromkeys(teams_order))
+    name_codes = np.asarray([name_categories.index(n) for n in teams_order] + [-1], dtype=np.int8)
+    df_all["TeamName"] = pd.Categorical.from_codes(
+        name_codes[team_codes(df_all["TeamId"], match_row)], categories=name_categories
+    )
+    df_all["Description"] = df_all["Description"].astype(str).astype("category")
+
+    # Flag column in Home/Away order, shared by both result frames.
+    flags = [name_to_flag.get(name, "") for name in teams_order]
 
     # 1) Count of events by team (all events)
-    counts = (
-        df_all.groupby("TeamName", dropna=False)
-        .size()
-        .reset_index(name="TotalEvents")
-        .sort_values("TotalEvents", ascending=False)
-    )
-    counts.insert(0, "Flag", counts["TeamName"].map(name_to_flag))  # add Flag first
+    # Home/Away rows come straight out of the reindex; the result frame is
+    # then built with its final column layout (Flag after TeamName) in one go.
+    sizes = df_all.groupby("TeamName", observed=False).size().reindex(teams_order, fill_value=0)
+    counts = pd.DataFrame({
+        "TeamName": teams_order,
+        "Flag": flags,
+        "TotalEvents": sizes.to_numpy(),
+    })
 
     # 2) Distribution of selected events by team
     dist = df_all[df_all["Description"].isin(WHITELIST_EVENTS)]
-    if dist.empty:
-        dist_pivot = pd.DataFrame(
-            {
-                "TeamName": [team_names[str(match_row["HomeId"])], team_names[str(match_row["AwayId"])]],
-                **{evt: [0, 0] for evt in WHITELIST_EVENTS},
-            }
-        )
-    else:
-        dist_pivot = (
-            dist.pivot_table(
-                index="TeamName", columns="Description", values="TeamId", aggfunc="count", fill_value=0
-            )
-            .reindex(columns=WHITELIST_EVENTS, fill_value=0)
-            .reset_index()
-        )
-    dist_pivot.insert(0, "Flag", dist_pivot["TeamName"].map(name_to_flag))  # add Flag first
-
-    # Ensure Home then Away ordering
-    teams_order = [team_names[str(match_row["HomeId"])], team_names[str(match_row["AwayId"])]]
-    counts = counts.set_index("TeamName").reindex(teams_order, fill_value=0).reset_index()
-    dist_pivot = dist_pivot.set_index("TeamName").reindex(teams_order, fill_value=0).reset_index()
+    # A plain count per (team, event) pair; the single reindex fixes the
+    # Home/Away row order and the event columns (zeros for anything unseen).
+    pivot = (
+        dist.groupby(["TeamName", "Description"], observed=True)
+        .size()
+        .unstack("Description", fill_value=0)
+        .reindex(index=teams_order, columns=WHITELIST_EVENTS, fill_value=0)
+    )
+    dist_pivot = pd.DataFrame({
+        "TeamName": teams_order,
+        "Flag": flags,
+        **{ev: pivot[ev].to_numpy() for ev in WHITELIST_EVENTS},
+    })
 
     return counts, dist_pivot
+
+# The derived tables below are deterministic for a match id, so only the id
+# is hashed; the leading underscore tells Streamlit to skip hashing the row.
+@st.cache_data(ttl=1800, show_spinner=False)
+def compute_event_stats_by_id(match_id: str, _match_row: pd.Series) -> tuple[pd.DataFrame, pd.DataFrame]:
+    events, _, _, _ = load_match_datasets_by_id(match_id)
+    return compute_event_stats(events, _match_row)
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def build_attack_tables_by_id(match_id: str, _match_row: pd.Series) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # (df_attack, minute_df, goals_df) as used by the momentum/cumulative plots.
+    events, squads, _, _ = load_match_datasets_by_id(match_id)
+    df_attack = build_attack_df(events, _match_row, squads=squads)
+    return df_attack, build_minute_matrix(df_attack, _match_row), build_goals_only(df_attack)
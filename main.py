@@ -24,22 +24,54 @@ Notes for a new Python learner:
 """
 
 # Import libraries
+import pandas as pd
 import streamlit as st
-from typing import Dict
+from collections import Counter
+from typing import Dict, Tuple
 from dotenv import load_dotenv
 
 from controllers.auth_controller import login_page, logout_button
-from controllers.data_controller import load_matches, load_match_datasets
-from common.utils import sort_matches_for_select, selectbox_with_placeholder
+from controllers.data_controller import load_matches, load_sorted_matches, load_match_datasets_by_id
+from common.utils import selectbox_with_placeholder
 from common.ui import sidebar_header
 from common.colors import pick_match_colors
 from common.team_profiles import get_team_profile_map
+from models.match_model import Match
 
 # Configure Streamlit page and load environment variables from `.env`.
 st.set_page_config(page_title="Futsal WC — Home", layout="wide")
 load_dotenv(override=False)
 
 
+def _build_match_options(df_sorted: pd.DataFrame, ids: Tuple[str, ...]):
+    """Return (labels, ids, label -> position, id -> position) for the selectbox."""
+    # "Stage | [Group |] Match | Date" labels, built on whole columns; the
+    # group is only shown for group-stage matches.
+    group = df_sorted["GroupName"].astype(str).str.strip()
+    show_group = (group != "") & (df_sorted["StageName"] == "Group Matches")
+    labels = (
+        df_sorted["StageName"].astype(str)
+        + (" | " + group).where(show_group, "")
+        + " | " + df_sorted["MatchName"].astype(str)
+        + " | " + df_sorted["KickoffDate"].astype(str)
+    ).tolist()
+
+    # Make labels unique if needed: repeated labels get their occurrence
+    # number appended ("... (2)", "... (3)") in a single pass.
+    seen: Counter = Counter()
+    unique_labels = []
+    for lab in labels:
+        seen[lab] += 1
+        unique_labels.append(lab if seen[lab] == 1 else f"{lab} ({seen[lab]})")
+
+    # Label -> row position in `df_sorted` (and `ids`), so the selected row is
+    # taken by position instead of re-scanning a stringified MatchId column.
+    label_to_pos: Dict[str, int] = {lab: i for i, lab in enumerate(unique_labels)}
+    # MatchIds are unique, so a reverse map replaces a linear `ids.index` scan.
+    id_to_index: Dict[str, int] = {mid: i for i, mid in enumerate(ids)}
+    return tuple(unique_labels), ids, label_to_pos, id_to_index
+
+
 def main():
     # Consistent sidebar header ABOVE page links
     user, _ = login_page()
@@ -63,47 +95,21 @@ def main():
     st.markdown("## Match selection")
     st.caption("Choose a match to load its timeline and enable the rest of the app pages.")
 
-    df_sorted = sort_matches_for_select(df_matches)
-
-    def _build_match_label(r):
-        parts = [str(r["StageName"])]
-
-        group = str(r.get("GroupName", "")).strip()
-        if group and r["StageName"] == "Group Matches":
-            parts.append(group)
-
-        parts.extend([
-            str(r["MatchName"]),
-            str(r["KickoffDate"])
-        ])
-
-        return " | ".join(parts)
-
+    df_sorted = load_sorted_matches()
 
-    labels = df_sorted.apply(_build_match_label, axis=1).tolist()
-    ids = df_sorted["MatchId"].astype(str).tolist()
-
-    # Make labels unique if needed
-    label_to_id: Dict[str, str] = {}
-    for lab, mid in zip(labels, ids):
-        if lab not in label_to_id:
-            label_to_id[lab] = mid
-        else:
-            c = 2
-            new_lab = f"{lab} ({c})"
-            while new_lab in label_to_id:
-                c += 1
-                new_lab = f"{lab} ({c})"
-            label_to_id[new_lab] = mid
-
-    labels = list(label_to_id.keys())
-    ids = list(label_to_id.values())
+    # Labels and lookup maps only change with the match set, so they are kept
+    # in session state (labels as a tuple) and rebuilt only when the MatchIds
+    # differ from the stored ones.
+    ids = tuple(df_sorted["MatchId"].astype(str))
+    options = st.session_state.get("_match_options")
+    if options is None or options[1] != ids:
+        options = _build_match_options(df_sorted, ids)
+        st.session_state["_match_options"] = options
+    labels, ids, label_to_pos, id_to_index = options
 
     # Restore previous selection if we have one
-    default_index = None
     prev_id = st.session_state.get("selected_match_id")
-    if prev_id and prev_id in ids:
-        default_index = ids.index(prev_id)
+    default_index = id_to_index.get(prev_id) if prev_id else None
 
     selected_label = selectbox_with_placeholder(
         "Choose a match:",
@@ -115,20 +121,29 @@ def main():
     if not selected_label:
         st.stop()
 
-    match_id = label_to_id.get(selected_label)
+    pos = label_to_pos.get(selected_label)
+    if pos is None:
+        st.stop()
+    match_id = ids[pos]
     if not match_id:
         st.stop()
 
-    # Persist for other pages
+    # Persist for other pages. The row is only materialized when the
+    # selection changes; reruns on the same match reuse the stored Series.
+    match_row = st.session_state.get("match_row_series")
+    if match_row is None or st.session_state.get("selected_match_id") != match_id:
+        match_row = df_sorted.iloc[pos]
+        st.session_state["match_row"] = match_row.to_dict()
+        # The row itself is kept too, so pages do not rebuild a Series from
+        # the dict on every rerun.
+        st.session_state["match_row_series"] = match_row
+        st.session_state["match"] = Match.from_row(match_row)
     st.session_state["selected_match_id"] = match_id
-
-    match_row = df_matches.loc[df_matches["MatchId"].astype(str) == str(match_id)]
-    if match_row.empty:
-        st.error("Match not found.")
-        st.stop()
-
-    match_row = match_row.iloc[0]
-    st.session_state["match_row"] = match_row.to_dict()
+    # Sessions started before the Match payload existed (or holding one from
+    # a reloaded module) get it rebuilt from the stored row.
+    match = st.session_state.get("match")
+    if not isinstance(match, Match):
+        match = st.session_state["match"] = Match.from_row(match_row)
 
     # Team tactical profiles
     cluster_map = get_team_profile_map()
@@ -145,31 +160,26 @@ def main():
 
     # Load selected match data
     with st.spinner(f'Loading timeline for {match_row["MatchName"]}...'):
-        events, squads, timeline = load_match_datasets(match_row)
-
-    # Compute final score from events
-    goals = events[events["Description"] == "Goal!"].copy()
-    goals["TeamId"] = goals["TeamId"].astype(str)
-    home_goals = int((goals["TeamId"] == str(match_row["HomeId"])).sum())
-    away_goals = int((goals["TeamId"] == str(match_row["AwayId"])).sum())
+        # The final score comes precomputed (and cached) with the datasets.
+        events, squads, timeline, (home_goals, away_goals) = load_match_datasets_by_id(str(match_id))
 
     # Selected match overview
     st.divider()
     st.markdown("## Selected match overview")
 
     parts = [
-        f'**Stage:** {match_row["StageName"]}',
+        f'**Stage:** {match.StageName}',
     ]
 
     # Only add Group if it exists and is meaningful
-    group = str(match_row.get("GroupName", "")).strip()
-    if group and match_row["StageName"] == "Group Matches":
+    group = match.GroupName.strip()
+    if group and match.StageName == "Group Matches":
         parts.append(f'**Group:** {group}')
 
     parts.extend([
-        f'**Match:** {match_row["MatchName"]}',
-        f'**Date:** {match_row.get("KickoffDate", "")}',
-        f'**Score:** {match_row["HomeName"]} ({home_goals}) - {match_row["AwayName"]} ({away_goals})'
+        f'**Match:** {match.MatchName}',
+        f'**Date:** {match.KickoffDate}',
+        f'**Score:** {match.HomeName} ({home_goals}) - {match.AwayName} ({away_goals})'
     ])
 
     st.markdown(" | ".join(parts))
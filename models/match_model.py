@@ -3,17 +3,22 @@ Small data model for a match row.
 
 This lightweight dataclass is a convenience wrapper that documents the
 expected fields for a match record. The class is frozen (immutable) to make
-it safer to pass around without accidental modification.
+it safer to pass around without accidental modification, and uses slots so
+instances carry no per-instance `__dict__`.
 
 Fields mirror the keys returned by the API and used throughout the app:
     - `MatchId`, `GroupName`, `StageName`, `HomeId`, `HomeName`, `AwayId`,
-        `AwayName`, `KickoffDate`.
+        `AwayName`, `KickoffDate`, `MatchName`.
+
+The Home page stores one instance in `st.session_state["match"]` when the
+selection changes; page headers read their fields from it.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from typing import Any, Mapping
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Match:
         MatchId: str
         GroupName: str
@@ -23,3 +28,10 @@ class Match:
         AwayId: str
         AwayName: str
         KickoffDate: str
+        MatchName: str
+
+        @classmethod
+        def from_row(cls, row: Mapping[str, Any]) -> "Match":
+                # Build from a match row (Series or dict), keeping only the
+                # documented fields as strings.
+                return cls(**{f.name: str(row.get(f.name, "")) for f in fields(cls)})
@@ -12,23 +12,25 @@ small: it only orchestrates loading data, computing the derived tables via
 """
 
 # Import libraries
+# Select the non-interactive backend before anything imports matplotlib
+# further; figures are only rendered to images for `st.pyplot`.
+import matplotlib
+matplotlib.use("Agg")
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 
-from controllers.data_controller import load_match_datasets
-from controllers.stats_controller import compute_event_stats
+from controllers.stats_controller import compute_event_stats_by_id, build_attack_tables_by_id
 from controllers.auth_controller import logout_button
 from common.ui import sidebar_header
 from common.team_profiles import get_team_profile_map
+from models.match_model import Match
 
 from common.metrics import (
-    build_attack_df, build_minute_matrix, build_goals_only,
     team_colors_map, HALFTIME_MINUTE, SMOOTH_TAU_MIN, TOP_N_PLAYERS
 )
 from common.plots import (
     plot_momentum, plot_smoothed, plot_top_players, plot_cumulative,
-    plot_events_count_bar, plot_event_distribution_grouped
+    plot_events_count_bar_plotly, plot_event_distribution_grouped_plotly, session_fig
 )
 
 # Explanations for each plot ---
@@ -93,6 +95,75 @@ def _is_light(hex_color: str) -> bool:
     return y >= 0.90
 
 
+@st.fragment
+def _advanced_plots(df_attack: pd.DataFrame, minute_df: pd.DataFrame, goals_df: pd.DataFrame,
+                    home: str, away: str, col_home: str, col_away: str):
+    """Render the advanced charts as a fragment with its own rerun scope.
+
+    The data is loaded (and cached) by `main`; widgets added inside this
+    function rerun only the fragment instead of the whole page.
+    """
+    # The four charts share one 2x2 figure (one render and one image sent to
+    # the browser instead of four); each panel keeps its own title and the
+    # per-chart notes follow below the figure.
+    _swatch_row(home, away, col_home, col_away)
+    colors = {home: col_home, away: col_away}
+    fig, ((ax_mom, ax_smooth), (ax_top, ax_cum)) = session_fig(
+        "stats_advanced",
+        figsize=(2 * SMALL_FIGSIZE[0], 2 * SMALL_FIGSIZE[1]),
+        constrained_layout=True,
+        nrows=2,
+        ncols=2,
+    )
+    plot_momentum(
+        minute_df,
+        (home, away),
+        goals_df,
+        halftime_minute=HALFTIME_MINUTE,
+        colors_map=colors,
+        ax=ax_mom,
+        show_legend=False,
+    )
+    plot_smoothed(
+        minute_df,
+        (home, away),
+        tau_minutes=SMOOTH_TAU_MIN,
+        colors_map=colors,
+        ax=ax_smooth,
+        legend_mode="none",
+    )
+    plot_top_players(
+        df_attack,
+        top_n=TOP_N_PLAYERS,
+        colors_map=colors,
+        ax=ax_top,
+        show_legend=False,
+    )
+    plot_cumulative(
+        df_attack,
+        colors_map=colors,
+        ax=ax_cum,
+        show_legend=False,
+    )
+    panels = [
+        (ax_mom, "Attacking momentum by minute",
+         "Weighted attacking actions per minute: Attempt = 1, Goal = 2.", "momentum"),
+        (ax_smooth, "Smoothed attacking momentum",
+         f"Exponentially weighted moving average with τ = {SMOOTH_TAU_MIN:g} minutes.", "smoothed"),
+        (ax_top, f"Top {TOP_N_PLAYERS} attacking players",
+         "Players ranked by weighted attacking contribution based on attempts and goals.", "top_players"),
+        (ax_cum, "Cumulative attacking actions",
+         "Running total of attacking actions across match time.", "cumulative"),
+    ]
+    for ax, title, _, _ in panels:
+        ax.set_title(title, fontsize=8)
+    st.pyplot(fig, use_container_width=False)
+
+    for _, title, summary, key in panels:
+        st.markdown(f"**{title}** — {summary}")
+        st.caption(CHART_DESCRIPTIONS[key])
+
+
 def main():
     _ensure_auth()
     sidebar_header(user=st.session_state.get("username"), show_custom_nav=True)
@@ -101,13 +172,17 @@ def main():
     _ensure_match_selected()
 
     # Recover selection & load match data
-    match_row = pd.Series(st.session_state["match_row"])
+    match_row = st.session_state.get("match_row_series")
+    if match_row is None:
+        match_row = pd.Series(st.session_state["match_row"])
+    # Header fields come from the Match stored with the selection on Home
+    match = st.session_state.get("match") or Match.from_row(match_row)
     cluster_map = get_team_profile_map()
     home_profile = cluster_map.get(str(match_row["HomeName"]), "Unknown")
     away_profile = cluster_map.get(str(match_row["AwayName"]), "Unknown")
 
-    events, squads, timeline = load_match_datasets(match_row)
-    counts, dist = compute_event_stats(events, match_row)
+    match_id = str(match_row["MatchId"])
+    counts, dist = compute_event_stats_by_id(match_id, match_row)
 
     # Colors (from SQLite), keep consistent with Home if present
     colors_map = team_colors_map(match_row)  # {'HomeName': hex, 'AwayName': hex}
@@ -129,25 +204,23 @@ def main():
         "attacking momentum, and player contribution."
     )
 
-    # Compute the final score from full events (Goal!)
-    goals = events[events["Description"] == "Goal!"].copy()
-    goals["TeamId"] = goals["TeamId"].astype(str)
-    home_goals = int((goals["TeamId"] == str(match_row["HomeId"])).sum())
-    away_goals = int((goals["TeamId"] == str(match_row["AwayId"])).sum())
+    # Final score: the distribution table already counts "Goal!" events per
+    # team, with rows in Home/Away order.
+    home_goals, away_goals = (int(g) for g in dist["Goal!"].to_numpy())
 
     parts = [
-        f'**Stage:** {match_row["StageName"]}',
+        f'**Stage:** {match.StageName}',
     ]
 
     # Only add Group if it exists and is meaningful
-    group = str(match_row.get("GroupName", "")).strip()
-    if group and match_row["StageName"] == "Group Matches":
+    group = match.GroupName.strip()
+    if group and match.StageName == "Group Matches":
         parts.append(f'**Group:** {group}')
 
     parts.extend([
-        f'**Match:** {match_row["MatchName"]}',
-        f'**Date:** {match_row.get("KickoffDate", "")}',
-        f'**Score:** {match_row["HomeName"]} ({home_goals}) - {match_row["AwayName"]} ({away_goals})'
+        f'**Match:** {match.MatchName}',
+        f'**Date:** {match.KickoffDate}',
+        f'**Score:** {match.HomeName} ({home_goals}) - {match.AwayName} ({away_goals})'
     ])
 
     st.markdown(" | ".join(parts))
@@ -178,17 +251,10 @@ def main():
 
     _swatch_row(home, away, col_home, col_away)
 
-    fig1, ax1 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_events_count_bar(
-        counts=counts,
-        match_row=match_row,
-        colors_map={home: col_home, away: col_away},
-        ax=ax1,
-        ylabel="",
-        title="",
+    st.plotly_chart(
+        plot_events_count_bar_plotly(counts, match_row, colors_map={home: col_home, away: col_away}),
+        use_container_width=False,
     )
-    st.pyplot(fig1, use_container_width=False)
-    plt.close(fig1)
 
     # ------------------------------------------------------------
     # TABLE + GROUPED BARS: Event type distribution
@@ -205,16 +271,10 @@ def main():
 
     _swatch_row(home, away, col_home, col_away)
 
-    fig2, ax2 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_event_distribution_grouped(
-        dist=dist,
-        match_row=match_row,
-        colors_map={home: col_home, away: col_away},
-        ax=ax2,
-        title="",
+    st.plotly_chart(
+        plot_event_distribution_grouped_plotly(dist, match_row, colors_map={home: col_home, away: col_away}),
+        use_container_width=False,
     )
-    st.pyplot(fig2, use_container_width=False)
-    plt.close(fig2)
 
     # ------------------------------------------------------------
     # ADVANCED ANALYSIS
@@ -228,75 +288,9 @@ def main():
     st.caption("Team colors are kept consistent across all charts for easier comparison.")
 
     # Advanced plots: momentum, smoothed EWMA, top players, cumulative
-    df_attack = build_attack_df(events, match_row, squads=squads)
-    minute_df = build_minute_matrix(df_attack, match_row)
-    goals_df = build_goals_only(df_attack)
-
-    st.subheader("Attacking momentum by minute")
-    st.caption("Weighted attacking actions per minute: Attempt = 1, Goal = 2.")
-    _swatch_row(home, away, col_home, col_away)
+    df_attack, minute_df, goals_df = build_attack_tables_by_id(match_id, match_row)
 
-    fig3, ax3 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_momentum(
-        minute_df,
-        (home, away),
-        goals_df,
-        halftime_minute=HALFTIME_MINUTE,
-        colors_map={home: col_home, away: col_away},
-        ax=ax3,
-        show_legend=False,
-    )
-    st.pyplot(fig3, use_container_width=False)
-    plt.close(fig3)
-    st.caption(CHART_DESCRIPTIONS["momentum"])
-
-    st.subheader("Smoothed attacking momentum")
-    st.caption(f"Exponentially weighted moving average with τ = {SMOOTH_TAU_MIN:g} minutes.")
-    _swatch_row(home, away, col_home, col_away)
-
-    fig4, ax4 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_smoothed(
-        minute_df,
-        (home, away),
-        tau_minutes=SMOOTH_TAU_MIN,
-        colors_map={home: col_home, away: col_away},
-        ax=ax4,
-        legend_mode="none",
-    )
-    st.pyplot(fig4, use_container_width=False)
-    plt.close(fig4)
-    st.caption(CHART_DESCRIPTIONS["smoothed"])
-
-    st.subheader(f"Top {TOP_N_PLAYERS} attacking players")
-    st.caption("Players ranked by weighted attacking contribution based on attempts and goals.")
-    _swatch_row(home, away, col_home, col_away)
-
-    fig5, ax5 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_top_players(
-        df_attack,
-        top_n=TOP_N_PLAYERS,
-        colors_map={home: col_home, away: col_away},
-        ax=ax5,
-        show_legend=False,
-    )
-    st.pyplot(fig5, use_container_width=False)
-    plt.close(fig5)
-    st.caption(CHART_DESCRIPTIONS["top_players"])
-
-    st.subheader("Cumulative attacking actions")
-    st.caption("Running total of attacking actions across match time.")
-    _swatch_row(home, away, col_home, col_away)
-
-    fig6, ax6 = plt.subplots(figsize=SMALL_FIGSIZE)
-    plot_cumulative(
-        df_attack,
-        colors_map={home: col_home, away: col_away},
-        ax=ax6,
-        show_legend=False,
-    )
-    st.pyplot(fig6, use_container_width=False)
-    plt.close(fig6)
-    st.caption(CHART_DESCRIPTIONS["cumulative"])
+    _advanced_plots(df_attack, minute_df, goals_df, home, away, col_home, col_away)
 
 
 if __name__ == "__main__":
@@ -3,10 +3,12 @@ from __future__ import annotations
 import pandas as pd
 import streamlit as st
 
+from common.flags import get_flags_for_match
 from common.ml_labels import CLUSTER_DESCRIPTIONS
 from common.team_profiles import compute_team_profile_outputs, plot_team_profiles_pca_plotly
 from common.ui import sidebar_header
 from controllers.auth_controller import logout_button
+from models.match_model import Match
 
 st.set_page_config(page_title="Team Profiles", layout="wide")
 
@@ -28,17 +30,9 @@ def _ensure_match_selected():
 
 def _get_flags(match_row):
     try:
-        from common.flags import get_flags_for_match
         return get_flags_for_match(match_row)
     except Exception:
-        try:
-            from common.flags import get_flag_url_by_team_id
-            return (
-                get_flag_url_by_team_id(str(match_row["HomeId"])),
-                get_flag_url_by_team_id(str(match_row["AwayId"])),
-            )
-        except Exception:
-            return "", ""
+        return "", ""
 
 
 def _metric_definitions() -> pd.DataFrame:
@@ -73,7 +67,11 @@ def main():
 
     _ensure_match_selected()
 
-    match_row = pd.Series(st.session_state["match_row"])
+    match_row = st.session_state.get("match_row_series")
+    if match_row is None:
+        match_row = pd.Series(st.session_state["match_row"])
+    # Header fields come from the Match stored with the selection on Home
+    match = st.session_state.get("match") or Match.from_row(match_row)
     home_team = str(match_row["HomeName"])
     away_team = str(match_row["AwayName"])
     home_flag, away_flag = _get_flags(match_row)
@@ -98,24 +96,24 @@ def main():
         if not df_attack.empty and match_id
         else pd.DataFrame()
     )
-    goals = events[events["Description"] == "Goal!"].copy()
-    goals["TeamId"] = goals["TeamId"].astype(str)
-    home_goals = int((goals["TeamId"] == str(match_row["HomeId"])).sum())
-    away_goals = int((goals["TeamId"] == str(match_row["AwayId"])).sum())
+    # One count per scoring team over the goal rows only (no frame copy).
+    goals_by_team = events.loc[events["Description"] == "Goal!", "TeamId"].astype(str).value_counts()
+    home_goals = int(goals_by_team.get(str(match_row["HomeId"]), 0))
+    away_goals = int(goals_by_team.get(str(match_row["AwayId"]), 0))
 
     parts = [
-        f'**Stage:** {match_row["StageName"]}',
+        f'**Stage:** {match.StageName}',
     ]
 
     # Only add Group if it exists and is meaningful
-    group = str(match_row.get("GroupName", "")).strip()
-    if group and match_row["StageName"] == "Group Matches":
+    group = match.GroupName.strip()
+    if group and match.StageName == "Group Matches":
         parts.append(f'**Group:** {group}')
 
     parts.extend([
-        f'**Match:** {match_row["MatchName"]}',
-        f'**Date:** {match_row.get("KickoffDate", "")}',
-        f'**Score:** {match_row["HomeName"]} ({home_goals}) - {match_row["AwayName"]} ({away_goals})'
+        f'**Match:** {match.MatchName}',
+        f'**Date:** {match.KickoffDate}',
+        f'**Score:** {match.HomeName} ({home_goals}) - {match.AwayName} ({away_goals})'
     ])
 
     st.markdown(" | ".join(parts))
@@ -9,14 +9,32 @@ image does not break the page.
 """
 
 # Import libraries
+# Select the non-interactive backend before anything imports matplotlib
+# further; the infographic is only ever rendered to PNG/PDF bytes.
+import matplotlib
+matplotlib.use("Agg")
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import requests
 import streamlit as st
+from PIL import Image
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.gridspec import GridSpec
 from matplotlib.patches import Patch
+from matplotlib.transforms import Bbox
 from io import BytesIO
 from controllers.auth_controller import logout_button
 from common.ui import sidebar_header
 from common.team_profiles import get_team_profile_map, compute_team_profile_outputs, plot_team_profiles_pca
+from common.plots import plot_momentum, plot_smoothed, plot_top_players, plot_cumulative
+from common.metrics import HALFTIME_MINUTE, SMOOTH_TAU_MIN, TOP_N_PLAYERS
+from common.colors import pick_match_colors
+from common.flags import get_flags_for_match
+from controllers.data_controller import load_match_datasets_by_id
+from controllers.stats_controller import build_attack_tables_by_id
 
 # --- Header layout knobs (easy to tweak) ---
 HEADER_POS = {
@@ -27,6 +45,12 @@ HEADER_POS = {
     "legend_y":   0.899,
 }
 
+# On-screen PNG resolution (the PDF export stays vector)
+SCREEN_DPI = 96
+
+# Flags are downsampled to this size (px, longest side) before plotting
+FLAG_MAX_PX = 256
+
 # Small, readable defaults (apply to figures created after this line)
 plt.rcParams.update({
     "axes.titlesize": 10,
@@ -37,6 +61,15 @@ plt.rcParams.update({
     "figure.dpi": 110,
 })
 
+# Cheaper line drawing for the momentum/cumulative panels. Applied only while
+# the infographic is built and saved (path settings are read at draw time),
+# so other pages' figures keep matplotlib's defaults.
+_DRAW_RC = {
+    "path.simplify": True,
+    "path.simplify_threshold": 1.0,
+    "agg.path.chunksize": 10000,
+}
+
 st.set_page_config(page_title="Infographic", layout="wide")
 
 
@@ -55,70 +88,103 @@ def _ensure_match_selected():
         st.stop()
 
 
-def _compute_score(events, home_id, away_id):
-    desc = events["Description"].astype(str).str.strip().str.lower()
-    g = events[desc.isin({"goal", "goal!"})].copy()
-    g["TeamId"] = g["TeamId"].astype(str)
-    home = int((g["TeamId"] == str(home_id)).sum())
-    away = int((g["TeamId"] == str(away_id)).sum())
-    return home, away
+@st.cache_resource(ttl=3600, show_spinner=False, max_entries=64)
+def _fetch_flag(url: str):
+    """Download and decode a flag image once per URL (RGBA array or None).
 
-
-def _add_flag(fig: plt.Figure, url: str, left: float, top: float, width: float = 0.10):
-    """Place a flag image at (left, top) in figure coordinates.
+    The decoded array is kept as a shared, read-only resource (up to 64
+    flags, evicted least-recently-used), so any team seen before costs
+    nothing on later matches, in any session.
 
     Implementation notes:
-      - This helper is intentionally forgiving: failure to download or open
-        the image is caught and silently ignored so that missing flags do not
-        break the infographic generation.
+      - A download failure raises `requests.RequestException`, so it is not
+        cached and the next rerun retries (`_fetch_flags` turns it into None
+        so that missing flags do not break the infographic generation). An
+        image that downloads but cannot be decoded is cached as None.
       - A desktop User-Agent header is used because some image servers
         block default Python UA strings.
-      - The image is placed using `fig.add_axes` with absolute figure
-        coordinates so flags remain in consistent positions regardless of
-        subplot layouts.
+      - The image is shrunk to at most FLAG_MAX_PX per side: a flag covers
+        ~130 px of the figure, so full-resolution pixels only cost draw time
+        and PDF size.
     """
     if not url:
-        return
+        return None
+
+    headers = {
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120.0.0.0 Safari/537.36"
+        )
+    }
+
+    # (connect, read): a slow flag host must not stall the page
+    r = requests.get(url, timeout=(2, 3), headers=headers)
+    r.raise_for_status()
 
     try:
-        from PIL import Image
-        import requests
-        from io import BytesIO as _BIO
-
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            )
-        }
-
-        r = requests.get(url, timeout=8, headers=headers)
-        r.raise_for_status()
-        im = Image.open(_BIO(r.content)).convert("RGBA")
+        im = Image.open(BytesIO(r.content)).convert("RGBA")
+        im.thumbnail((FLAG_MAX_PX, FLAG_MAX_PX), Image.Resampling.LANCZOS)
+        arr = np.asarray(im)
+        arr.setflags(write=False)
+        return arr
     except Exception:
+        return None
+
+
+def _fetch_flag_or_none(url: str):
+    try:
+        return _fetch_flag(url)
+    except requests.RequestException:
+        return None
+
+
+def _fetch_flags(*urls):
+    """Fetch several flags concurrently (one worker per URL); see `_fetch_flag`.
+
+    The downloads are independent network waits, so a cold cache costs the
+    slowest one rather than their sum. Workers get the current script run
+    context so the `st.cache_resource` wrapper behaves as on the main thread.
+    Empty URLs and failed downloads map to None; empty URLs start no worker.
+    """
+    todo = [u for u in urls if u]
+    if not todo:
+        return [None] * len(urls)
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    with ThreadPoolExecutor(max_workers=len(todo), initializer=add_script_run_ctx, initargs=(None, ctx)) as ex:
+        fetched = dict(zip(todo, ex.map(_fetch_flag_or_none, todo)))
+    return [fetched.get(u) for u in urls]
+
+
+def _add_flag(fig: Figure, im, left: float, top: float, width: float = 0.10):
+    """Place a decoded flag image (from `_fetch_flag`) at (left, top) in figure coordinates.
+
+    The image is placed using `fig.add_axes` with absolute figure coordinates
+    so flags remain in consistent positions regardless of subplot layouts.
+    A missing image (None) is skipped.
+    """
+    if im is None:
         return
 
     w = width
-    h = width * (im.size[1] / im.size[0])  # keep aspect ratio
+    h = width * (im.shape[0] / im.shape[1])  # keep aspect ratio
     ax_img = fig.add_axes([left, top - h, w, h], anchor="NW")
     ax_img.imshow(im)
     ax_img.axis("off")
 
 
-def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
-                 flag_left_url: str | None, flag_right_url: str | None) -> plt.Figure:
-    # Lazy imports so import-time errors don’t hide the page
-    from common.plots import plot_momentum, plot_smoothed, plot_top_players, plot_cumulative
-    from common.metrics import HALFTIME_MINUTE, SMOOTH_TAU_MIN, TOP_N_PLAYERS
-
+def _make_figure(match_row, score, df_attack, minute_df, goals_df, colors_map,
+                 flag_left, flag_right) -> Figure:
     home, away = str(match_row["HomeName"]), str(match_row["AwayName"])
     col_home = colors_map.get(home, "#777777")
     col_away = colors_map.get(away, "#999999")
-    home_g, away_g = _compute_score(events, match_row["HomeId"], match_row["AwayId"])
+    cmap = {home: col_home, away: col_away}  # shared by all four panels
+    home_g, away_g = score
 
-    # Reserve generous top space so header/legend never overlap plots
-    fig = plt.figure(figsize=(12.5, 19.5))
+    # Reserve generous top space so header/legend never overlap plots.
+    # A bare Figure (not plt.figure): not tracked by pyplot, freed once the bytes are taken.
+    fig = Figure(figsize=(12.5, 19.5))
     fig.subplots_adjust(top=0.86, bottom=0.08)
     gs = GridSpec(3, 2, figure=fig, height_ratios=[1, 1, 1.15], hspace=0.20, wspace=0.25)
 
@@ -129,7 +195,7 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
         (home, away),
         goals_df,
         halftime_minute=HALFTIME_MINUTE,
-        colors_map={home: col_home, away: col_away},
+        colors_map=cmap,
         ax=ax1,
         show_legend=False,
     )
@@ -141,7 +207,7 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
         minute_df,
         (home, away),
         tau_minutes=SMOOTH_TAU_MIN,
-        colors_map={home: col_home, away: col_away},
+        colors_map=cmap,
         ax=ax2,
         legend_mode="none",
     )
@@ -152,7 +218,7 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
     plot_top_players(
         df_attack,
         top_n=TOP_N_PLAYERS,
-        colors_map={home: col_home, away: col_away},
+        colors_map=cmap,
         ax=ax3,
         show_legend=False,
     )
@@ -162,7 +228,7 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
     ax4 = fig.add_subplot(gs[1, 1])
     plot_cumulative(
         df_attack,
-        colors_map={home: col_home, away: col_away},
+        colors_map=cmap,
         ax=ax4,
         show_legend=False,
     )
@@ -254,8 +320,8 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
     )
 
     # Flags in the extreme top corners
-    _add_flag(fig, flag_left_url, left=0.02, top=0.975, width=0.095)
-    _add_flag(fig, flag_right_url, left=0.885, top=0.975, width=0.095)
+    _add_flag(fig, flag_left, left=0.02, top=0.975, width=0.095)
+    _add_flag(fig, flag_right, left=0.885, top=0.975, width=0.095)
 
     # Footer note for academic framing
     fig.text(
@@ -271,6 +337,75 @@ def _make_figure(match_row, events, df_attack, minute_df, goals_df, colors_map,
     return fig
 
 
+def _build_infographic(match_id: str, home_color: str, away_color: str,
+                       match_row, flag_images) -> Figure:
+    """Draw a fresh infographic figure from the cached per-match tables."""
+    # Final score comes with the cached match datasets (no goal counting here)
+    _, _, _, score = load_match_datasets_by_id(match_id)
+    df_attack, minute_df, goals_df = build_attack_tables_by_id(match_id, match_row)
+    colors_map = {
+        str(match_row["HomeName"]): home_color,
+        str(match_row["AwayName"]): away_color,
+    }
+
+    return _make_figure(
+        match_row,
+        score,
+        df_attack,
+        minute_df,
+        goals_df,
+        colors_map,
+        *flag_images,
+    )
+
+
+@st.cache_resource(ttl=1800, max_entries=16, show_spinner=False)
+def _render_infographic(match_id: str, home_color: str, away_color: str,
+                        home_flag: str, away_flag: str, flags_ok: tuple[bool, bool],
+                        _match_row, _flag_images) -> tuple[bytes, tuple[float, float, float, float]]:
+    """Render the infographic once per (match, palette, flags); return (PNG bytes, bbox extents).
+
+    Reruns on the same match only re-serve the PNG; no matplotlib drawing
+    happens on a cache hit. Only immutable values are cached: the figure is
+    discarded after export. The tight bounding box is measured once here and
+    its extents (inches) are reused as a fixed `bbox_inches` for the PNG and
+    the on-demand PDF, so neither savefig runs its own tight-bbox pass.
+    The TTL matches `load_match_datasets_by_id`, so a score or timeline that
+    was still changing is redrawn. `_match_row` and `_flag_images` are not
+    hashed (they follow from `match_id` and the flag URLs); `flags_ok` records
+    which flags were actually fetched, so a render made while a flag download
+    failed is never served once the flag is available.
+    """
+    png = BytesIO()
+    with matplotlib.rc_context(_DRAW_RC):
+        fig = _build_infographic(match_id, home_color, away_color, _match_row, _flag_images)
+        bbox = fig.get_tightbbox().padded(0.1)  # same padding as bbox_inches="tight"
+        fig.savefig(png, format="png", dpi=SCREEN_DPI, bbox_inches=bbox)
+    return png.getvalue(), tuple(bbox.extents)
+
+
+@st.cache_resource(ttl=1800, max_entries=16, show_spinner=False)
+def _render_infographic_pdf(match_id: str, home_color: str, away_color: str,
+                            home_flag: str, away_flag: str, flags_ok: tuple[bool, bool],
+                            _match_row, _flag_images) -> bytes:
+    """Build the infographic PDF bytes (only when requested).
+
+    The figure is redrawn from the same cached tables and flags; only the
+    resulting bytes are kept.
+    """
+    _, extents = _render_infographic(match_id, home_color, away_color, home_flag, away_flag, flags_ok,
+                                     _match_row, _flag_images)
+    pdf = BytesIO()
+    with matplotlib.rc_context(_DRAW_RC):
+        fig = _build_infographic(match_id, home_color, away_color, _match_row, _flag_images)
+        fig.savefig(pdf, format="pdf", bbox_inches=Bbox.from_extents(*extents))
+    return pdf.getvalue()
+
+
+def _request_pdf(key: tuple) -> None:
+    st.session_state["_infographic_pdf_key"] = key
+
+
 def main():
     _ensure_auth()
     sidebar_header(user=st.session_state.get("username"), show_custom_nav=True)
@@ -278,33 +413,16 @@ def main():
 
     _ensure_match_selected()
 
-    # Lazy imports
-    from controllers.data_controller import load_match_datasets
-    from common.colors import pick_match_colors
-    from common.metrics import build_attack_df, build_minute_matrix, build_goals_only
-
-    # Flags helper (support either function name)
+    # Flags helper: missing flags must not break the page
     def _get_flags(match_row):
         try:
-            from common.flags import get_flags_for_match
             return get_flags_for_match(match_row)
         except Exception:
-            try:
-                from common.flags import get_flag_url_by_team_id
-                return (
-                    get_flag_url_by_team_id(str(match_row["HomeId"])),
-                    get_flag_url_by_team_id(str(match_row["AwayId"])),
-                )
-            except Exception:
-                return "", ""
-
-    import pandas as pd
-
-    match_row = pd.Series(st.session_state["match_row"])
-    events, squads, _ = load_match_datasets(match_row)
-    df_attack = build_attack_df(events, match_row, squads=squads)
-    minute_df = build_minute_matrix(df_attack, match_row)
-    goals_df = build_goals_only(df_attack)
+            return "", ""
+
+    match_row = st.session_state.get("match_row_series")
+    if match_row is None:
+        match_row = pd.Series(st.session_state["match_row"])
 
     pal = pick_match_colors(
         home_name=str(match_row["HomeName"]),
@@ -312,10 +430,6 @@ def main():
         home_id=str(match_row["HomeId"]),
         away_id=str(match_row["AwayId"]),
     )
-    colors_map = {
-        str(match_row["HomeName"]): pal.home_color,
-        str(match_row["AwayName"]): pal.away_color,
-    }
 
     home_flag, away_flag = _get_flags(match_row)
 
@@ -324,29 +438,26 @@ def main():
         "Static summary figure designed for academic presentation and PDF export."
     )
 
-    fig = _make_figure(
-        match_row,
-        events,
-        df_attack,
-        minute_df,
-        goals_df,
-        colors_map,
-        home_flag,
-        away_flag,
-    )
-    st.pyplot(fig, use_container_width=True)
-
-    # Download PDF
-    pdf = BytesIO()
-    fig.savefig(pdf, format="pdf", bbox_inches="tight")
-    st.download_button(
-        "⬇️ Download PDF",
-        data=pdf.getvalue(),
-        file_name=f"infographic_{match_row['HomeName']}_vs_{match_row['AwayName']}.pdf",
-        mime="application/pdf",
-    )
-    plt.close(fig)
-
+    # Flags are fetched first (cached per URL) so the render key can record
+    # which of them are actually available.
+    flag_images = _fetch_flags(home_flag or "", away_flag or "")
+    flags_ok = tuple(im is not None for im in flag_images)
+    key = (str(match_row["MatchId"]), pal.home_color, pal.away_color, home_flag, away_flag, flags_ok)
+    png, _ = _render_infographic(*key, match_row, flag_images)
+    st.image(png, use_container_width=True)
+
+    # Download PDF: only serialized once the user asks for it. The request is
+    # remembered per render key, so later reruns (including the one the
+    # download itself triggers) keep the download button until the match,
+    # palette or flags change.
+    st.button("Prepare PDF", on_click=_request_pdf, args=(key,))
+    if st.session_state.get("_infographic_pdf_key") == key:
+        st.download_button(
+            "⬇️ Download PDF",
+            data=_render_infographic_pdf(*key, match_row, flag_images),
+            file_name=f"infographic_{match_row['HomeName']}_vs_{match_row['AwayName']}.pdf",
+            mime="application/pdf",
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file